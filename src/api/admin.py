@@ -1,11 +1,17 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Request
+from time import time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
+from src.api.public import cache_stats
 from src.config import settings
+from src.repos import history_repo
 from src.security.api_key import require_admin_api_key
+from src.worker.jobs import recompute_queue
 
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
@@ -35,9 +41,60 @@ def admin_config(request: Request, _=Depends(require_admin_api_key)):
     }
 
 
+@router.get("/cache/stats")
+@limiter.limit(lambda: settings.ADMIN_RATE_LIMIT)
+def admin_cache_stats(request: Request, _=Depends(require_admin_api_key)):
+    # 이 웹 프로세스 기준 (gunicorn worker마다 따로 집계됨)
+    return {"caches": cache_stats()}
+
+
 @router.post("/recompute")
 @limiter.limit(lambda: settings.ADMIN_RATE_LIMIT)
 def recompute_now(request: Request, _=Depends(require_admin_api_key)):
-    # MVP: real recompute is on-the-fly in /stations.
-    # In production: trigger worker job + cache result.
-    return {"ok": True, "message": "MVP에서는 /api/public/stations가 실시간 계산합니다."}
+    """
+    재계산 job을 큐에 넣는다. 이미 대기 중인 job이 있으면 그 job으로 합쳐짐(coalesce).
+    - Redis 사용: 워커가 바로 꺼내서 실행
+    - Redis 없음: 웹 프로세스의 drain 스레드가 직접 실행
+    """
+    job = recompute_queue.enqueue()
+    return {"ok": True, "job": job}
+
+
+@router.get("/recompute/status")
+@limiter.limit(lambda: settings.ADMIN_RATE_LIMIT)
+def recompute_status(
+    request: Request,
+    job_id: Optional[str] = Query(default=None, description="생략하면 가장 최근 job"),
+    _=Depends(require_admin_api_key),
+):
+    job = recompute_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"ok": True, "job": job}
+
+
+@router.get("/history/{station_id}")
+@limiter.limit(lambda: settings.ADMIN_RATE_LIMIT)
+def station_history(
+    request: Request,
+    station_id: str,
+    days: float = Query(default=7.0, gt=0, le=365, description="조회 기간(일)"),
+    resolution: str = Query(default="auto", pattern="^(auto|raw|hour)$"),
+    _=Depends(require_admin_api_key),
+):
+    """
+    대여소 히스토리 조회(분석용). 라이브 캐시/계산 경로는 건드리지 않음.
+    히스토리 파일은 워커가 씀: 웹과 워커가 디스크를 공유할 때만 동작하고,
+    아니면 워커에서 `python -m src.worker.history_query`로 조회.
+    """
+    if not history_repo.is_enabled():
+        raise HTTPException(status_code=404, detail="History disabled")
+    if not history_repo.is_available():
+        raise HTTPException(
+            status_code=503,
+            detail="History store is not on this service; query it on the worker (python -m src.worker.history_query)",
+        )
+
+    since_ts = int(time() - days * 86400)
+    points = history_repo.query_station_history(station_id, since_ts, resolution=resolution)
+    return {"station_id": station_id, "since_ts": since_ts, "points": points}
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import Counter
+from time import time
+from typing import Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from src.config import settings
+from src.repos.event_buffer import QueueFullError, event_buffer
+from src.repos.event_log import KINDS, parse_ts
+from src.repos.events_repo import is_enabled as events_store_enabled
+from src.repos.stations_repo import has_station
+from src.security.api_key import require_ingest_api_key
+
+router = APIRouter(prefix="/api/ingest", tags=["ingest"])
+
+
+def _parse_events(body: bytes, content_type: str) -> list:
+    """
+    application/x-ndjson: one event object per line (a bad line becomes None -> counted invalid)
+    application/json: [events...] or {"events": [events...]}
+    """
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        events = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                events.append(None)
+        return events
+
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+
+    if isinstance(data, dict):
+        data = data.get("events")
+    if not isinstance(data, list):
+        raise HTTPException(status_code=400, detail="Expected an array of events")
+    return data
+
+
+def _aggregate(events: list, now: float) -> Tuple[Counter, int, int, int]:
+    """
+    Count valid events per (station_id, kind). Returns (counts, invalid, stale, unknown).
+    Events older than the scoring window would only inflate counters that should
+    already have expired, so they are skipped (stale). No ts = now.
+    station_id must be in the station registry (unknown ids never become Redis keys).
+    """
+    cutoff = now - max(settings.WINDOW_MIN, 1) * 60
+    counts: Counter = Counter()
+    invalid = 0
+    stale = 0
+    unknown = 0
+    for ev in events:
+        if not isinstance(ev, dict):
+            invalid += 1
+            continue
+        station_id = str(ev.get("station_id") or "").strip()
+        kind = str(ev.get("kind") or "").strip().lower()
+        if not station_id or kind not in KINDS:
+            invalid += 1
+            continue
+        if ev.get("ts") is not None:
+            try:
+                ts = parse_ts(ev["ts"])
+            except (ValueError, TypeError):
+                invalid += 1
+                continue
+            if ts < cutoff:
+                stale += 1
+                continue
+        if not has_station(station_id):
+            unknown += 1
+            continue
+        counts[(station_id, kind)] += 1
+    return counts, invalid, stale, unknown
+
+
+async def _read_body_limited(request: Request, limit: int) -> bytes:
+    # Content-Length가 있으면 읽기 전에 거절, 없거나(chunked) 거짓이면 읽으면서 거절
+    too_large = HTTPException(status_code=413, detail=f"Body too large (max {limit} bytes)")
+    length = request.headers.get("content-length")
+    if length is not None:
+        try:
+            if int(length) > limit:
+                raise too_large
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Content-Length")
+
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@router.post("/events", status_code=202)
+async def ingest_events(request: Request, _=Depends(require_ingest_api_key)):
+    """
+    대여/반납 이벤트 일괄 수집 ({"station_id": "...", "kind": "rent"|"return", "ts": 선택}).
+    WINDOW_MIN보다 오래된 이벤트는 stale, 등록되지 않은 대여소는 unknown_station으로 건너뜀. 같은 대여소/종류는 요청 안에서 먼저 합산하고, 버퍼가 묶어서 Redis에 한 번에 씀.
+    버퍼가 가득 차면 429, Redis가 꺼져 있으면 (쓸 곳이 없으므로) 503.
+    """
+    if not events_store_enabled():
+        raise HTTPException(status_code=503, detail="Event store (Redis) not configured")
+
+    body = await _read_body_limited(request, settings.INGEST_MAX_BODY_BYTES)
+
+    # 큰 배치의 JSON 파싱/집계는 CPU 작업이라 이벤트 루프 밖에서
+    events = await asyncio.to_thread(_parse_events, body, request.headers.get("content-type", ""))
+    if len(events) > settings.INGEST_MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {settings.INGEST_MAX_BATCH})")
+
+    counts, invalid, stale, unknown = await asyncio.to_thread(_aggregate, events, time())
+
+    accepted = len(events) - invalid - stale - unknown
+    if accepted:
+        try:
+            event_buffer.submit(counts, accepted)
+        except QueueFullError:
+            raise HTTPException(status_code=429, detail="Ingest queue full", headers={"Retry-After": "1"})
+
+    return {"ok": True, "accepted": accepted, "invalid": invalid, "stale": stale, "unknown_station": unknown}
+
+
+@router.get("/metrics")
+async def ingest_metrics(_=Depends(require_ingest_api_key)):
+    # 이 웹 프로세스 기준
+    return event_buffer.metrics()
@@ -1,115 +1,175 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-import os
-import random
-import time
-from typing import Any, Dict, Tuple
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
+from src.cache.lru import LRUCache
+from src.cache.single_flight import SingleFlightCache
 from src.config import settings
 from src.domain.incentives import (
     compute_route_free_minutes,
-    compute_station_rewards,
     haversine_km,
 )
-from src.domain.models import RouteIncentiveOut, StationOut
-from src.domain.scoring import StationState, compute_scores
-from src.integrations.tashu_client import fetch_live_status
-from src.repos.events_repo import get_window_counts
+from src.domain.models import RegionOut, RouteIncentiveOut
+from src.domain.demand_profiles import profiles_version
+from src.domain.scoring import StationState, compute_scores_many
+from src.repos.events_repo import get_window_counts_many
+from src.repos.live_repo import (
+    apply_live,
+    fetch_live_dict,
+    get_live_mode,
+    snapshot_tick,
+    snapshot_version,
+)
 from src.repos.stations_repo import get_station, list_stations, touch_update
+from src.worker.tasks import compute_shard, get_published_manifest, get_published_many
 
 router = APIRouter(prefix="/api/public", tags=["public"])
 limiter = Limiter(key_func=get_remote_address)
 logger = logging.getLogger(__name__)
 
+# 동시에 들어온 같은 계산은 한 번만 수행하고 결과를 짧게 재사용
+_stations_flight = SingleFlightCache("public.stations", ttl_sec=settings.PUBLIC_CACHE_TTL_SEC)
+_live_flight = SingleFlightCache("public.live", ttl_sec=settings.PUBLIC_CACHE_TTL_SEC)
 
-def mock_bikes(station_id: str, capacity: int) -> int:
-    """
-    대여소별 bikes를 '시간에 따라 조금씩 변하는' 가짜 데이터로 생성.
-    - 같은 station_id는 같은 시점에 항상 같은 값(안정적)
-    - 20초마다 값이 조금씩 바뀜(실시간 느낌)
-    """
-    t = int(time.time() // 20)  # 20초 단위로 패턴 변경
-    rnd = random.Random(hash(station_id) ^ t)
-    return rnd.randint(0, max(0, int(capacity)))
+# (from, to, window counts, data/profile/params version) -> RouteIncentiveOut. 버전이 바뀌면 자연히 miss 후 밀려남
+_route_cache = LRUCache("public.route", max_entries=settings.ROUTE_CACHE_SIZE)
 
 
-async def _get_live_dict_if_real(live_mode: str) -> Dict[str, Any]:
+async def _get_live_shared(live_mode: str) -> Dict[str, Any]:
     """
-    LIVE_MODE=real 일 때만 실시간 딕셔너리 가져오기.
-    실패하면 {} 반환.
+    fetch_live_dict + single-flight (동시 요청이 live fetch를 한 번만 하도록)
     """
     if live_mode != "real":
         return {}
+    return await _live_flight.get_or_compute(
+        ("live", snapshot_version(live_mode)),
+        lambda: fetch_live_dict(live_mode),
+    )
 
-    try:
-        live = await fetch_live_status()
-        if live is None:
-            return {}
-        return live
-    except Exception:
-        logger.exception("fetch_live_status failed; using empty live dict")
-        return {}
+
+def _params_version() -> Tuple:
+    """
+    점수/인센티브 계산에 들어가는 파라미터. 바뀌면 route 캐시 키도 바뀜.
+    """
+    return (
+        settings.F_LOW, settings.F_HIGH, settings.WINDOW_MIN, settings.PRED_MIN, settings.PROFILE_BLEND,
+        settings.MAX_FREE_MIN, settings.ALPHA, settings.BETA, settings.ROUTE_K, settings.DIST_PENALTY_KM,
+    )
+
+
+@lru_cache(maxsize=65536)
+def _station_distance_km(from_lat: float, from_lon: float, to_lat: float, to_lon: float) -> float:
+    # 좌표는 고정이므로 쌍별 거리는 한 번만 계산 (좌표가 곧 키)
+    return haversine_km(from_lat, from_lon, to_lat, to_lon)
+
+
+def cache_stats() -> list:
+    dist = _station_distance_km.cache_info()
+    return [
+        _stations_flight.stats(),
+        _live_flight.stats(),
+        _route_cache.stats(),
+        {"name": "public.distance", "hits": dist.hits, "misses": dist.misses,
+         "entries": dist.currsize, "max_entries": dist.maxsize},
+    ]
+
+
+async def _compute_stations(live_mode: str, region_id: Optional[str] = None) -> list:
+    """
+    워커와 같은 경로(apply_live -> compute_shard)로 계산해서 결과가 항상 일치하도록.
+    """
+    tick = snapshot_tick()
+    live = await _get_live_shared(live_mode)
+
+    stations = [s for s in list_stations() if region_id is None or s.region_id == region_id]
+    apply_live(stations, live_mode, live, tick=tick)
+
+    # Redis MGET + 전체 점수 계산은 블로킹: 스레드에서 돌려야 루프가 살아 있고
+    # 그동안 들어온 같은 요청이 in-flight task에 합류할 수 있음
+    _, out = await asyncio.to_thread(compute_shard, region_id or "*", stations, touch_update())
+    return out
+
+
+def _published_stations(manifest: dict, region_id: Optional[str]) -> Optional[str]:
+    """
+    Raw JSON array from the published shards (all regions joined as text, one MGET).
+    None if a shard is missing (expired) -> caller computes.
+    """
+    keys = [r["key"] for r in manifest["regions"] if region_id is None or r["region_id"] == region_id]
+    if not keys:
+        return None
+    raws = get_published_many(keys)
+    if any(raw is None for raw in raws):
+        return None
+    if len(raws) == 1:
+        return raws[0]
+    # 각 shard는 JSON 배열: 괄호만 벗겨서 이어 붙임
+    return "[" + ",".join(raw[1:-1] for raw in raws if raw != "[]") + "]"
 
 
 @router.get("/stations")
 @limiter.limit(lambda: settings.PUBLIC_RATE_LIMIT)
-async def stations(request: Request):
+async def stations(
+    request: Request,
+    region_id: Optional[str] = Query(default=None, description="지정하면 해당 권역만"),
+):
     """
     stations 리스트를 반환.
     - LIVE_MODE=mock (기본): bikes를 mock으로 생성
     - LIVE_MODE=real: fetch_live_status()로 실시간 값 덮어쓰기(나중에 붙일 때)
+    - 워커가 최근(PUBLISHED_MAX_AGE_SEC 이내)에 발행한 shard가 있으면 역직렬화 없이 그대로 반환,
+      없으면 직접 계산 (region_id: 해당 권역 대여소만)
     """
-    live_mode = os.getenv("LIVE_MODE", "mock").lower()
-    live = await _get_live_dict_if_real(live_mode)
-
-    out = []
-    updated_at = touch_update()
-
-    for s in list_stations():
-        # bikes/capacity 결정 (mock or real)
-        if live_mode == "mock":
-            s.bikes = mock_bikes(s.station_id, s.capacity)
-        else:
-            if s.station_id in live:
-                s.bikes = int(live[s.station_id].get("bikes", s.bikes))
-                if "capacity" in live[s.station_id]:
-                    s.capacity = int(live[s.station_id].get("capacity", s.capacity))
-
-        rents, returns = get_window_counts(s.station_id)
-
-        state = StationState(
-            capacity=s.capacity,
-            bikes=s.bikes,
-            rent_count_w=rents,
-            return_count_w=returns,
-        )
+    live_mode = get_live_mode()
 
-        shortage_score, congestion_score = compute_scores(state)
-        reward_rent, reward_return = compute_station_rewards(shortage_score, congestion_score)
-
-        out.append(
-            StationOut(
-                station_id=s.station_id,
-                name=s.name,
-                lat=s.lat,
-                lon=s.lon,
-                region_id=s.region_id,
-                capacity=s.capacity,
-                bikes=s.bikes,
-                shortage_score=shortage_score,
-                congestion_score=congestion_score,
-                reward_return=reward_return,
-                reward_rent=reward_rent,
-                updated_at=updated_at,
-            ).model_dump()
-        )
+    manifest = get_published_manifest(live_mode)
+    if manifest is not None:
+        raw = _published_stations(manifest, region_id)
+        if raw is not None:
+            return Response(content=raw, media_type="application/json")
 
-    return out
+    return await _stations_flight.get_or_compute(
+        ("stations", region_id, snapshot_version(live_mode)),
+        lambda: _compute_stations(live_mode, region_id),
+    )
+
+
+@router.get("/regions", response_model=List[RegionOut])
+@limiter.limit(lambda: settings.PUBLIC_RATE_LIMIT)
+async def regions(request: Request):
+    """
+    권역별 요약(워커 manifest). manifest가 없거나 오래됐으면 전체 계산 결과로 집계.
+    """
+    live_mode = get_live_mode()
+
+    manifest = get_published_manifest(live_mode)
+    if manifest is not None:
+        return manifest["regions"]
+
+    rows = await _stations_flight.get_or_compute(
+        ("stations", None, snapshot_version(live_mode)),
+        lambda: _compute_stations(live_mode),
+    )
+
+    agg: Dict[str, List[dict]] = {}
+    for r in rows:
+        agg.setdefault(r["region_id"], []).append(r)
+    return [
+        RegionOut(
+            region_id=rid,
+            shortage=sum(r["shortage_score"] for r in rs) / len(rs),
+            congestion=sum(r["congestion_score"] for r in rs) / len(rs),
+            stations=len(rs),
+        )
+        for rid, rs in agg.items()
+    ]
 
 
 @router.get("/route", response_model=RouteIncentiveOut)
@@ -122,46 +182,50 @@ async def route_incentive(
     """
     지도에서 두 대여소를 선택했을 때 이동 인센티브(무료 분) 계산
     """
+    live_mode = get_live_mode()
+    # 지도가 워커 snapshot을 보고 있으면 같은 tick의 bikes로 계산해야 숫자가 맞음
+    manifest = get_published_manifest(live_mode)
+    tick = int(manifest["tick"]) if manifest is not None else snapshot_tick()
+    # 두 대여소의 window 카운트(MGET 한 번)도 키에 포함: ingest로 늘거나 TTL로 줄면 바로 miss
+    counts = get_window_counts_many([from_station_id, to_station_id])
+    cache_key = (
+        from_station_id, to_station_id, tuple(counts),
+        snapshot_version(live_mode), tick, profiles_version(), _params_version(),
+    )
+    cached = _route_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     s_from = get_station(from_station_id)
     s_to = get_station(to_station_id)
     if not s_from or not s_to:
         raise HTTPException(status_code=404, detail="Station not found")
 
-    live_mode = os.getenv("LIVE_MODE", "mock").lower()
-    live = await _get_live_dict_if_real(live_mode)
+    live = await _get_live_shared(live_mode)
 
     # stations와 동일한 기준으로 bikes 값 맞추기 (중요)
-    if live_mode == "mock":
-        s_from.bikes = mock_bikes(s_from.station_id, s_from.capacity)
-        s_to.bikes = mock_bikes(s_to.station_id, s_to.capacity)
-    else:
-        if s_from.station_id in live:
-            s_from.bikes = int(live[s_from.station_id].get("bikes", s_from.bikes))
-        if s_to.station_id in live:
-            s_to.bikes = int(live[s_to.station_id].get("bikes", s_to.bikes))
-
-    # 출발 대여소 점수 계산
-    rents_f, returns_f = get_window_counts(s_from.station_id)
+    apply_live([s_from, s_to], live_mode, live, tick=tick)
+
+    # 출발/도착 대여소 점수 계산 (프로파일 조회는 한 번에)
+    (rents_f, returns_f), (rents_t, returns_t) = counts
     st_f = StationState(
         capacity=s_from.capacity,
         bikes=s_from.bikes,
         rent_count_w=rents_f,
         return_count_w=returns_f,
+        station_id=s_from.station_id,
     )
-    sh_f, co_f = compute_scores(st_f)
-
-    # 도착 대여소 점수 계산
-    rents_t, returns_t = get_window_counts(s_to.station_id)
     st_t = StationState(
         capacity=s_to.capacity,
         bikes=s_to.bikes,
         rent_count_w=rents_t,
         return_count_w=returns_t,
+        station_id=s_to.station_id,
     )
-    sh_t, co_t = compute_scores(st_t)
+    (sh_f, co_f), (sh_t, co_t) = compute_scores_many([st_f, st_t])
 
     # 거리
-    dist_km = haversine_km(s_from.lat, s_from.lon, s_to.lat, s_to.lon)
+    dist_km = _station_distance_km(s_from.lat, s_from.lon, s_to.lat, s_to.lon)
 
     # ✅ 여기서 점수로 계산하고 튜플로 받기
     free_minutes, reason = compute_route_free_minutes(
@@ -170,13 +234,15 @@ async def route_incentive(
         km=dist_km,
     )
 
-    return RouteIncentiveOut(
+    out = RouteIncentiveOut(
         from_station_id=s_from.station_id,
         to_station_id=s_to.station_id,
         distance_km=float(dist_km),
         free_minutes=int(free_minutes),
         reason=str(reason),
     )
+    _route_cache.put(cache_key, out)
+    return out
 
 
 
@@ -194,7 +260,7 @@ async def debug_live(
     if x_api_key != settings.ADMIN_API_KEY:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    live_mode = os.getenv("LIVE_MODE", "mock").lower()
+    live_mode = get_live_mode()
     stations = list_stations()
 
     if live_mode == "mock":
@@ -205,7 +271,7 @@ async def debug_live(
             "sample_station_ids": [s.station_id for s in stations[:10]],
         }
 
-    live = await _get_live_dict_if_real("real")
+    live = await fetch_live_dict("real")
     matched = sum(1 for s in stations if s.station_id in live)
 
     return {
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Optional
+from typing import List, Optional
 import redis
 from src.config import settings
 
@@ -21,13 +21,62 @@ class RedisCache:
         pipe.expire(key, ttl_sec)
         pipe.execute()
 
+    def incr_many_with_ttl(self, amounts: dict[str, int], ttl_sec: int) -> None:
+        """
+        INCRBY + EXPIRE for many keys in one pipelined round trip.
+        """
+        if not self.client or not amounts:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for key, n in amounts.items():
+            pipe.incrby(key, n)
+            pipe.expire(key, ttl_sec)
+        pipe.execute()
+
     def get_int(self, key: str) -> int:
         if not self.client:
             return 0
         v = self.client.get(key)
         return int(v) if v else 0
 
+    def get_ints(self, keys: list[str]) -> list[int]:
+        if not self.client or not keys:
+            return [0] * len(keys)
+        return [int(v) if v else 0 for v in self.client.mget(keys)]
+
     def set_json(self, key: str, value: str, ttl_sec: int) -> None:
         if not self.client:
             return
         self.client.set(key, value, ex=ttl_sec)
+
+    def get_str(self, key: str) -> Optional[str]:
+        if not self.client:
+            return None
+        return self.client.get(key)
+
+    def hset_with_ttl(self, key: str, mapping: dict, ttl_sec: int) -> None:
+        if not self.client:
+            return
+        pipe = self.client.pipeline()
+        pipe.hset(key, mapping=mapping)
+        pipe.expire(key, ttl_sec)
+        pipe.execute()
+
+    def get_strs(self, keys: list[str]) -> List[Optional[str]]:
+        if not self.client or not keys:
+            return [None] * len(keys)
+        return self.client.mget(keys)
+
+    def register_script(self, source: str):
+        """
+        Lua script callable as script(keys=[...], args=[...]); runs atomically via EVALSHA
+        (the source is only resent if Redis doesn't have it cached). None if Redis is disabled.
+        """
+        if not self.client:
+            return None
+        return self.client.register_script(source)
+
+    def hgetall(self, key: str) -> dict:
+        if not self.client:
+            return {}
+        return self.client.hgetall(key)
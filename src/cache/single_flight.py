@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlightCache:
+    """
+    In-process request coalescing + micro-cache (per web worker process).
+    - same key while a computation is running -> await the same asyncio task
+    - finished result is kept for ttl_sec (errors are never cached)
+    Keys should include a snapshot version so a new data tick is always a miss.
+    """
+    def __init__(self, name: str, ttl_sec: float, max_entries: int = 64):
+        self.name = name
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self._results: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get_or_compute(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        hit = self._results.get(key)
+        if hit is not None:
+            expires_at, value = hit
+            if monotonic() < expires_at:
+                self.hits += 1
+                return value
+            del self._results[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._run(key, fn))
+            self._inflight[key] = task
+
+        # shield: one client disconnecting must not cancel the shared computation
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await fn()
+            self._results[key] = (monotonic() + self.ttl_sec, value)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "name": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "entries": len(self._results),
+            "inflight": len(self._inflight),
+            "ttl_sec": self.ttl_sec,
+        }
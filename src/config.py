@@ -15,6 +15,10 @@ class Settings(BaseSettings):
     WINDOW_MIN: int = 10
     PRED_MIN: int = 15
 
+    # demand profiles (offline-built; empty path -> linear drift only)
+    DEMAND_PROFILE_PATH: str = "data/demand_profiles.bin"
+    PROFILE_BLEND: float = 0.6
+
     # incentives
     MAX_FREE_MIN: int = 15
     ALPHA: float = 18.0
@@ -22,6 +26,28 @@ class Settings(BaseSettings):
     ROUTE_K: float = 14.0
     DIST_PENALTY_KM: float = 8.0
 
+    # event ingestion (INGEST_API_KEY unset -> ADMIN_API_KEY)
+    INGEST_API_KEY: str | None = None
+    INGEST_MAX_BATCH: int = 50000
+    INGEST_MAX_BODY_BYTES: int = 8_000_000
+    INGEST_QUEUE_MAX_EVENTS: int = 200000
+    INGEST_FLUSH_EVENTS: int = 20000
+    INGEST_FLUSH_INTERVAL_MS: int = 200
+
+    # worker (0 = os.cpu_count())
+    WORKER_PROCESSES: int = 0
+
+    # history (SQLite, empty path disables)
+    HISTORY_DB_PATH: str = "data/history.sqlite3"
+    HISTORY_RAW_RETENTION_DAYS: int = 7
+    HISTORY_HOURLY_RETENTION_DAYS: int = 90
+
+    # public API micro-cache (per process)
+    PUBLIC_CACHE_TTL_SEC: float = 5.0
+    # worker publishes every 60s; its snapshot is served while younger than this
+    PUBLISHED_MAX_AGE_SEC: float = 90.0
+    ROUTE_CACHE_SIZE: int = 4096
+
     # rate limit
     PUBLIC_RATE_LIMIT: str = "60/minute"
     ADMIN_RATE_LIMIT: str = "20/minute"
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sys
+from array import array
+from functools import lru_cache
+from pathlib import Path
+from time import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parents[2]  # bike-incentive/
+
+MAGIC = b"BIKEPROF1\n"
+DAY_SEC = 86400
+RELOAD_CHECK_SEC = 60
+
+
+def _weekday_and_second(local_ts: float) -> Tuple[int, float]:
+    day = int(local_ts // DAY_SEC)
+    # epoch day 0 (1970-01-01) is a Thursday -> Monday=0
+    return (day + 3) % 7, local_ts - day * DAY_SEC
+
+
+@lru_cache(maxsize=8)
+def _horizon_segments(minute_ts: int, horizon_min: int, slot_min: int, tz_offset_min: int) -> Tuple[Tuple[int, float], ...]:
+    """
+    Split [minute_ts, minute_ts + horizon) into (weekday*slots + slot, minutes) pieces.
+    Same for every station in a tick, so it is cached.
+    """
+    slot_sec = slot_min * 60
+    slots = DAY_SEC // slot_sec
+    t = float(minute_ts + tz_offset_min * 60)
+    remaining = float(horizon_min)
+    out: List[Tuple[int, float]] = []
+    while remaining > 1e-9:
+        wd, sec = _weekday_and_second(t)
+        slot = int(sec // slot_sec)
+        span = min(remaining, ((slot + 1) * slot_sec - sec) / 60.0)
+        out.append((wd * slots + slot, span))
+        remaining -= span
+        t += span * 60
+    return tuple(out)
+
+
+class DemandProfiles:
+    """
+    Dense per-station demand profile: net rents per minute (rents - returns)
+    for every (weekday, time slot), stored as one flat float32 array.
+    rates[(row * 7 + weekday) * slots + slot]
+    """
+    def __init__(self, station_ids: List[str], slot_min: int, tz_offset_min: int, rates: array):
+        self.station_ids = station_ids
+        self.slot_min = slot_min
+        self.tz_offset_min = tz_offset_min
+        self.slots = DAY_SEC // (slot_min * 60)
+        self.rates = rates
+        self.index: Dict[str, int] = {sid: i for i, sid in enumerate(station_ids)}
+        # ((minute_ts, horizon_min), per-row expected net rents) for the current minute
+        self._expected_cache: Optional[Tuple[Tuple[int, int], array]] = None
+
+        if len(rates) != len(station_ids) * 7 * self.slots:
+            raise ValueError("profile array size does not match header")
+
+    def expected_vector(self, ts: float, horizon_min: int) -> array:
+        """
+        Expected (rents - returns) over the next horizon_min minutes for every row at once.
+        Each horizon segment is one strided slice of the flat array (a whole column);
+        the result is cached for the current minute, so a tick's lookups are plain indexing.
+        """
+        key = (int(ts // 60) * 60, int(horizon_min))
+        cached = self._expected_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        stride = 7 * self.slots
+        vec = array("d", bytes(8 * len(self.station_ids)))
+        for off, span in _horizon_segments(key[0], key[1], self.slot_min, self.tz_offset_min):
+            col = self.rates[off::stride]
+            vec = array("d", [acc + r * span for acc, r in zip(vec, col)])
+
+        self._expected_cache = (key, vec)
+        return vec
+
+    def expected_net_rents_many(self, station_ids: List[str], ts: float, horizon_min: int) -> List[Optional[float]]:
+        """
+        Batch lookup: expected net rents per station id (None for stations without a profile).
+        """
+        vec = self.expected_vector(ts, horizon_min)
+        index = self.index
+        out: List[Optional[float]] = []
+        for sid in station_ids:
+            row = index.get(sid)
+            out.append(vec[row] if row is not None else None)
+        return out
+
+    def expected_net_rents(self, station_id: str, ts: float, horizon_min: int) -> Optional[float]:
+        return self.expected_net_rents_many([station_id], ts, horizon_min)[0]
+
+    def save(self, path: str) -> None:
+        header = {
+            "station_ids": self.station_ids,
+            "slot_min": self.slot_min,
+            "tz_offset_min": self.tz_offset_min,
+        }
+        data = array("f", self.rates)
+        if sys.byteorder != "little":
+            data.byteswap()
+
+        tmp = f"{path}.tmp"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            f.write(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n")
+            f.write(data.tobytes())
+        os.replace(tmp, path)  # readers never see a half-written file
+
+    @classmethod
+    def load(cls, path: str) -> "DemandProfiles":
+        with open(path, "rb") as f:
+            if f.readline() != MAGIC:
+                raise ValueError(f"not a demand profile file: {path}")
+            header = json.loads(f.readline().decode("utf-8"))
+            rates = array("f")
+            rates.frombytes(f.read())
+        if sys.byteorder != "little":
+            rates.byteswap()
+        return cls(header["station_ids"], int(header["slot_min"]), int(header["tz_offset_min"]), rates)
+
+
+def build_profiles(
+    events: Iterable[Tuple[str, float, str]],
+    slot_min: int = 15,
+    tz_offset_min: int = 540,
+) -> DemandProfiles:
+    """
+    Offline batch: aggregate (station_id, ts, kind) events into per-weekday/slot net-rent rates.
+    Each cell is averaged over the number of distinct local days observed for that weekday.
+    """
+    if DAY_SEC % (slot_min * 60) != 0:
+        raise ValueError("slot_min must divide a day evenly")
+
+    slots = DAY_SEC // (slot_min * 60)
+    width = 7 * slots
+    station_ids: List[str] = []
+    index: Dict[str, int] = {}
+    net: List[array] = []
+    days_seen: List[set] = [set() for _ in range(7)]
+
+    for station_id, ts, kind in events:
+        row = index.get(station_id)
+        if row is None:
+            row = index[station_id] = len(station_ids)
+            station_ids.append(station_id)
+            net.append(array("f", bytes(4 * width)))
+
+        local = ts + tz_offset_min * 60
+        wd, sec = _weekday_and_second(local)
+        days_seen[wd].add(int(local // DAY_SEC))
+        net[row][wd * slots + int(sec // (slot_min * 60))] += 1.0 if kind == "rent" else -1.0
+
+    rates = array("f")
+    for row_arr in net:
+        for wd in range(7):
+            denom = max(len(days_seen[wd]), 1) * slot_min
+            for slot in range(slots):
+                row_arr[wd * slots + slot] /= denom
+        rates.extend(row_arr)
+
+    return DemandProfiles(station_ids, slot_min, tz_offset_min, rates)
+
+
+def profile_path() -> Optional[Path]:
+    # 상대경로는 실행 위치가 아니라 프로젝트 루트 기준 (history_repo.db_path()와 동일)
+    if not settings.DEMAND_PROFILE_PATH:
+        return None
+    p = Path(settings.DEMAND_PROFILE_PATH)
+    return p if p.is_absolute() else BASE_DIR / p
+
+
+_profiles: Optional[DemandProfiles] = None
+_profiles_mtime = 0.0
+_checked_at = 0.0
+
+
+def get_profiles() -> Optional[DemandProfiles]:
+    """
+    Currently deployed profiles (None if no file). Picks up a rebuilt file within RELOAD_CHECK_SEC.
+    """
+    global _profiles, _profiles_mtime, _checked_at
+    path = profile_path()
+    if path is None:
+        return None
+
+    now = time()
+    if now - _checked_at < RELOAD_CHECK_SEC:
+        return _profiles
+    _checked_at = now
+
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        _profiles = None
+        return None
+
+    if _profiles is None or mtime != _profiles_mtime:
+        try:
+            _profiles = DemandProfiles.load(path)
+            _profiles_mtime = mtime
+        except Exception:
+            logger.exception("failed to load demand profiles from %s", path)
+            _profiles = None
+    return _profiles
+
+
+def profiles_version() -> float:
+    """
+    mtime of the loaded profile file (0 if none). Goes into result cache keys.
+    """
+    return _profiles_mtime if get_profiles() is not None else 0.0
@@ -1,6 +1,9 @@
 from __future__ import annotations
 from dataclasses import dataclass
+from time import time
+from typing import List, Optional
 from src.config import settings
+from src.domain.demand_profiles import get_profiles
 
 
 @dataclass
@@ -9,21 +12,39 @@ class StationState:
     bikes: int
     rent_count_w: int
     return_count_w: int
+    station_id: str = ""
 
 
-def compute_predicted_bikes(state: StationState) -> float:
-    # simple drift model
+def expected_net_rents_many(station_ids: List[str], now: Optional[float] = None) -> List[Optional[float]]:
+    """
+    Profile-based expected (rents - returns) over PRED_MIN for many stations in one pass.
+    None where no profile is loaded / station has no profile.
+    """
+    profiles = get_profiles()
+    if profiles is None:
+        return [None] * len(station_ids)
+    return profiles.expected_net_rents_many(
+        station_ids, now if now is not None else time(), settings.PRED_MIN
+    )
+
+
+def compute_predicted_bikes(state: StationState, expected_net_rents: Optional[float] = None) -> float:
+    # simple drift model: last WINDOW_MIN rents/returns extrapolated over PRED_MIN
     w = max(settings.WINDOW_MIN, 1)
     drift_per_min = (state.rent_count_w - state.return_count_w) / w
-    return state.bikes - drift_per_min * settings.PRED_MIN
+    net_rents = drift_per_min * settings.PRED_MIN
 
+    # blend with the time-of-day profile (looked up by expected_net_rents_many)
+    if expected_net_rents is not None:
+        b = min(max(settings.PROFILE_BLEND, 0.0), 1.0)
+        net_rents = b * expected_net_rents + (1.0 - b) * net_rents
 
-def compute_scores(state: StationState) -> tuple[float, float]:
-    """
-    Returns (shortage_score, congestion_score) normalized by capacity: 0..~1
-    """
+    return state.bikes - net_rents
+
+
+def _scores(state: StationState, expected_net_rents: Optional[float]) -> tuple[float, float]:
     cap = max(state.capacity, 1)
-    bikes_pred = compute_predicted_bikes(state)
+    bikes_pred = compute_predicted_bikes(state, expected_net_rents)
 
     target_low = settings.F_LOW * cap
     target_high = settings.F_HIGH * cap
@@ -32,3 +53,19 @@ def compute_scores(state: StationState) -> tuple[float, float]:
     congestion = max(0.0, bikes_pred - target_high)
 
     return (shortage / cap, congestion / cap)
+
+
+def compute_scores(state: StationState, now: Optional[float] = None) -> tuple[float, float]:
+    """
+    Returns (shortage_score, congestion_score) normalized by capacity: 0..~1
+    """
+    expected = expected_net_rents_many([state.station_id], now)[0] if state.station_id else None
+    return _scores(state, expected)
+
+
+def compute_scores_many(states: List[StationState], now: Optional[float] = None) -> List[tuple[float, float]]:
+    """
+    compute_scores for a whole shard/station list: one profile lookup pass for all states.
+    """
+    expected = expected_net_rents_many([st.station_id for st in states], now)
+    return [_scores(st, e) for st, e in zip(states, expected)]
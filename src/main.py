@@ -9,6 +9,8 @@ from src.middleware.rate_limit import init_rate_limiter, add_rate_limit_exceptio
 
 from src.api.public import router as public_router
 from src.api.admin import router as admin_router
+from src.api.ingest import router as ingest_router
+from src.repos.event_buffer import event_buffer
 
 from pathlib import Path
 from fastapi.staticfiles import StaticFiles
@@ -33,6 +35,10 @@ def create_app() -> FastAPI:
     # Routes
     app.include_router(public_router)
     app.include_router(admin_router)
+    app.include_router(ingest_router)
+
+    # 종료 시 버퍼에 남은 이벤트 flush
+    app.add_event_handler("shutdown", event_buffer.close)
 
     # Static (절대경로로 고정: Render에서도 안 깨짐)
     BASE_DIR = Path(__file__).resolve().parents[1]   # 프로젝트 루트(bike-incentive)
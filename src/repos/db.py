@@ -1,2 +1,28 @@
 # MVP: DB 연결은 생략해도 전체 시스템이 동작하도록 구성해둠.
 # 실데이터 붙일 때 여기서 Postgres 연결/쿼리 작성하면 됨.
+# 지금은 히스토리 저장용 SQLite 연결만 제공 (라이브 서빙 경로와 분리된 파일).
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+
+def connect_sqlite(path: str) -> sqlite3.Connection:
+    """
+    Open a SQLite file tuned for append-heavy writes + concurrent readers.
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    # 다른 연결(백그라운드 compaction)이 쓰는 중이면 바로 실패하지 말고 잠깐 기다림
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+def connect_sqlite_readonly(path: str) -> sqlite3.Connection:
+    """
+    Read-only connection: never creates the file (or its directory) as a side effect.
+    """
+    uri = Path(path).resolve().as_uri() + "?mode=ro"
+    return sqlite3.connect(uri, uri=True, check_same_thread=False)
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import Counter
+from time import perf_counter
+from typing import Optional, Tuple
+
+from src.config import settings
+from src.repos.events_repo import is_enabled as events_store_enabled, record_events_bulk
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class EventBuffer:
+    """
+    Micro-batching in front of record_events_bulk (one instance per web process).
+    - submit(): request batches are pre-aggregated per (station, kind) and queued
+    - flusher task merges queued batches and writes them in one pipeline
+      when INGEST_FLUSH_EVENTS are pending or INGEST_FLUSH_INTERVAL_MS elapsed
+    - pending events are bounded by INGEST_QUEUE_MAX_EVENTS (QueueFullError -> 429)
+    """
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._collecting: Optional[Tuple[Counter, int]] = None
+        self.pending_events = 0
+        self.accepted_total = 0
+        self.rejected_total = 0
+        self.flushed_total = 0
+        self.dropped_total = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._flush_ms_sum = 0.0
+        self.last_flush_keys = 0
+
+    def _ensure_started(self) -> asyncio.Queue:
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self._queue  # type: ignore[return-value]
+
+    def submit(self, counts: Counter, n_events: int) -> None:
+        if self.pending_events + n_events > settings.INGEST_QUEUE_MAX_EVENTS:
+            self.rejected_total += n_events
+            raise QueueFullError()
+
+        queue = self._ensure_started()
+        self.pending_events += n_events
+        self.accepted_total += n_events
+        queue.put_nowait((counts, n_events))
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        assert queue is not None
+
+        while True:
+            # 첫 배치가 올 때까지는 그냥 대기
+            counts, n = await queue.get()
+            merged: Counter = Counter(counts)
+            self._collecting = (merged, n)
+            deadline = loop.time() + settings.INGEST_FLUSH_INTERVAL_MS / 1000
+
+            while n < settings.INGEST_FLUSH_EVENTS:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    more, k = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                merged.update(more)
+                n += k
+                self._collecting = (merged, n)
+
+            self._collecting = None
+            await self._flush(merged, n)
+
+    async def _flush(self, merged: Counter, n: int) -> None:
+        t0 = perf_counter()
+        try:
+            if not events_store_enabled():
+                logger.warning("events store (Redis) disabled; dropping %d events", n)
+                self.dropped_total += n
+                return
+            # redis client is sync: keep the event loop free
+            await asyncio.to_thread(record_events_bulk, dict(merged))
+            self.flushed_total += n
+        except Exception:
+            logger.exception("event flush failed; dropping %d events", n)
+            self.flush_errors += 1
+            self.dropped_total += n
+        finally:
+            ms = (perf_counter() - t0) * 1000
+            self.pending_events -= n
+            self.flushes += 1
+            self.last_flush_ms = ms
+            self.max_flush_ms = max(self.max_flush_ms, ms)
+            self._flush_ms_sum += ms
+            self.last_flush_keys = len(merged)
+
+    async def close(self) -> None:
+        """
+        Flush what is still queued (called on app shutdown).
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        merged: Counter = Counter()
+        n = 0
+        if self._collecting is not None:
+            merged, n = self._collecting
+            self._collecting = None
+        queue = self._queue
+        while queue is not None and not queue.empty():
+            counts, k = queue.get_nowait()
+            merged.update(counts)
+            n += k
+        if n:
+            await self._flush(merged, n)
+
+    def metrics(self) -> dict:
+        return {
+            "queue_depth_events": self.pending_events,
+            "queue_depth_batches": self._queue.qsize() if self._queue is not None else 0,
+            "queue_max_events": settings.INGEST_QUEUE_MAX_EVENTS,
+            "accepted_total": self.accepted_total,
+            "rejected_total": self.rejected_total,
+            "flushed_total": self.flushed_total,
+            "dropped_total": self.dropped_total,
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(self._flush_ms_sum / self.flushes, 2) if self.flushes else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 2),
+            "last_flush_keys": self.last_flush_keys,
+        }
+
+
+event_buffer = EventBuffer()
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import csv
+import datetime
+import json
+from pathlib import Path
+from typing import Iterator, Tuple
+
+KINDS = ("rent", "return")
+
+
+def parse_ts(v) -> float:
+    """
+    epoch seconds (int/float/str) or ISO-8601 ("Z" allowed; naive = UTC)
+    """
+    if isinstance(v, (int, float)):
+        return float(v)
+    s = str(v).strip()
+    try:
+        return float(s)
+    except ValueError:
+        pass
+    dt = datetime.datetime.fromisoformat(s.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return dt.timestamp()
+
+
+def iter_events(path: str | Path) -> Iterator[Tuple[str, float, str]]:
+    """
+    Historical rent/return event file reader.
+    - .csv: header must include station_id, ts, kind
+    - .ndjson / .jsonl: one {"station_id", "ts", "kind"} object per line
+    Yields (station_id, ts_epoch_sec, kind). Bad rows are skipped.
+    """
+    path = Path(path)
+    if path.suffix.lower() in (".ndjson", ".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                    ev = (str(row["station_id"]).strip(), parse_ts(row["ts"]), str(row["kind"]).strip().lower())
+                except (ValueError, KeyError, TypeError):
+                    continue
+                if ev[0] and ev[2] in KINDS:
+                    yield ev
+        return
+
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        required = {"station_id", "ts", "kind"}
+        if not reader.fieldnames or not required.issubset(set(reader.fieldnames)):
+            raise ValueError(f"event CSV header must include: {sorted(required)}. got: {reader.fieldnames}")
+
+        for row in reader:
+            station_id = (row.get("station_id") or "").strip()
+            kind = (row.get("kind") or "").strip().lower()
+            if not station_id or kind not in KINDS:
+                continue
+            try:
+                ts = parse_ts(row.get("ts") or "")
+            except ValueError:
+                continue
+            yield station_id, ts, kind
@@ -4,6 +4,10 @@ from src.config import settings
 
 _cache = RedisCache()
 
+def is_enabled() -> bool:
+    # window counters live only in Redis; without it events have nowhere to go
+    return _cache.is_enabled()
+
 def _key(station_id: str, kind: str) -> str:
     # kind: rent / return
     return f"w{settings.WINDOW_MIN}:station:{station_id}:{kind}"
@@ -17,6 +21,17 @@ def record_event(station_id: str, kind: str) -> None:
     if _cache.is_enabled():
         _cache.incr_with_ttl(_key(station_id, kind), ttl_sec=ttl)
 
+def record_events_bulk(counts: dict[tuple[str, str], int]) -> None:
+    """
+    Apply pre-aggregated {(station_id, kind): n} increments in one pipeline.
+    """
+    ttl = max(settings.WINDOW_MIN, 1) * 60
+    if _cache.is_enabled():
+        _cache.incr_many_with_ttl(
+            {_key(station_id, kind): n for (station_id, kind), n in counts.items()},
+            ttl_sec=ttl,
+        )
+
 def get_window_counts(station_id: str) -> tuple[int, int]:
     """
     returns (rent_count_w, return_count_w)
@@ -27,3 +42,16 @@ def get_window_counts(station_id: str) -> tuple[int, int]:
     rents = _cache.get_int(_key(station_id, "rent"))
     returns = _cache.get_int(_key(station_id, "return"))
     return rents, returns
+
+def get_window_counts_many(station_ids: list[str]) -> list[tuple[int, int]]:
+    """
+    get_window_counts for many stations in one MGET round trip.
+    """
+    if not _cache.is_enabled():
+        return [(0, 0)] * len(station_ids)
+    keys = []
+    for sid in station_ids:
+        keys.append(_key(sid, "rent"))
+        keys.append(_key(sid, "return"))
+    vals = _cache.get_ints(keys)
+    return [(vals[i], vals[i + 1]) for i in range(0, len(vals), 2)]
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from time import time
+from typing import Iterable, List, Optional
+
+from src.config import settings
+from src.repos.db import connect_sqlite, connect_sqlite_readonly
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parents[2]  # bike-incentive/
+
+HOUR_SEC = 3600
+DAY_SEC = 86400
+COMPACT_EVERY_SEC = HOUR_SEC
+
+# (station_id, ts) clustered primary key -> "station X over a time range" is an index range scan
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS station_history (
+    station_id    TEXT    NOT NULL,
+    ts            INTEGER NOT NULL,
+    bikes         INTEGER NOT NULL,
+    shortage      REAL    NOT NULL,
+    congestion    REAL    NOT NULL,
+    reward_rent   INTEGER NOT NULL,
+    reward_return INTEGER NOT NULL,
+    PRIMARY KEY (station_id, ts)
+) WITHOUT ROWID;
+
+-- compaction(시간 범위 rollup / retention delete)은 station_id 없이 ts로만 거름
+CREATE INDEX IF NOT EXISTS station_history_ts ON station_history (ts);
+
+CREATE TABLE IF NOT EXISTS station_history_hourly (
+    station_id        TEXT    NOT NULL,
+    ts                INTEGER NOT NULL,
+    samples           INTEGER NOT NULL,
+    bikes             REAL    NOT NULL,
+    bikes_min         INTEGER NOT NULL,
+    bikes_max         INTEGER NOT NULL,
+    shortage          REAL    NOT NULL,
+    congestion        REAL    NOT NULL,
+    reward_rent       INTEGER NOT NULL,
+    reward_return     INTEGER NOT NULL,
+    PRIMARY KEY (station_id, ts)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS station_history_hourly_ts ON station_history_hourly (ts);
+
+CREATE TABLE IF NOT EXISTS history_meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+_conn: Optional[sqlite3.Connection] = None
+_read_conn: Optional[sqlite3.Connection] = None
+_lock = threading.Lock()
+
+# compaction은 별도 연결 + 백그라운드 스레드: 재계산 경로(append_snapshot)를 막지 않음
+_compact_conn: Optional[sqlite3.Connection] = None
+_compact_lock = threading.Lock()
+_compact_thread: Optional[threading.Thread] = None
+_last_compact_at = 0.0
+
+
+def is_enabled() -> bool:
+    return bool(settings.HISTORY_DB_PATH)
+
+
+def db_path() -> Path:
+    # 상대경로는 실행 위치가 아니라 프로젝트 루트 기준
+    p = Path(settings.HISTORY_DB_PATH)
+    return p if p.is_absolute() else BASE_DIR / p
+
+
+def is_available() -> bool:
+    """
+    True only where the store file exists, i.e. in the process/host that writes it (the worker).
+    Web and worker are separate services on Render, so the web side usually sees False.
+    """
+    return is_enabled() and db_path().exists()
+
+
+def _get_conn() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        _conn = connect_sqlite(str(db_path()))
+        _conn.executescript(_SCHEMA)
+    return _conn
+
+
+def _get_read_conn() -> sqlite3.Connection:
+    # writer 프로세스면 그 연결을, 아니면 파일을 만들지 않는 읽기 전용 연결을 사용
+    global _read_conn
+    if _conn is not None:
+        return _conn
+    if _read_conn is None:
+        _read_conn = connect_sqlite_readonly(str(db_path()))
+    return _read_conn
+
+
+def append_snapshot(stations: Iterable[dict], ts: Optional[int] = None) -> int:
+    """
+    Append one recompute cycle (StationOut-shaped dicts) in a single batched transaction.
+    Returns number of rows written (0 if history is disabled).
+    """
+    if not is_enabled():
+        return 0
+
+    ts = int(ts if ts is not None else time())
+    rows = [
+        (
+            s["station_id"],
+            ts,
+            int(s["bikes"]),
+            float(s["shortage_score"]),
+            float(s["congestion_score"]),
+            int(s["reward_rent"]),
+            int(s["reward_return"]),
+        )
+        for s in stations
+    ]
+
+    with _lock:
+        conn = _get_conn()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO station_history VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    maybe_compact(now=ts)
+    return len(rows)
+
+
+def maybe_compact(now: Optional[float] = None) -> bool:
+    """
+    Start compact() in a background thread at most once per COMPACT_EVERY_SEC.
+    Never blocks the caller; skipped while a previous compaction is still running.
+    """
+    global _last_compact_at, _compact_thread
+    now = now if now is not None else time()
+    if now - _last_compact_at < COMPACT_EVERY_SEC:
+        return False
+    if _compact_thread is not None and _compact_thread.is_alive():
+        return False
+    _last_compact_at = now
+    _compact_thread = threading.Thread(target=_compact_logged, args=(now,), name="history-compact", daemon=True)
+    _compact_thread.start()
+    return True
+
+
+def _compact_logged(now: float) -> None:
+    try:
+        compact(now=now)
+    except Exception:
+        logger.exception("history compaction failed")
+
+
+def _get_compact_conn() -> sqlite3.Connection:
+    global _compact_conn
+    if _compact_conn is None:
+        _get_conn()  # schema
+        _compact_conn = connect_sqlite(str(db_path()))
+    return _compact_conn
+
+
+def _run_tx(conn: sqlite3.Connection, sql: str, params: tuple) -> None:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(sql, params)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _delete_before(conn: sqlite3.Connection, table: str, cutoff: int) -> None:
+    # 한 시간 단위로 잘라서 지움: 쓰기 잠금을 짧게 잡아 append가 사이사이 끼어들 수 있게
+    first = conn.execute(f"SELECT MIN(ts) FROM {table}").fetchone()[0]
+    if first is None:
+        return
+    upto = int(first) - int(first) % HOUR_SEC
+    while upto < cutoff:
+        upto = min(upto + HOUR_SEC, cutoff)
+        _run_tx(conn, f"DELETE FROM {table} WHERE ts < ?", (upto,))
+
+
+def compact(now: Optional[float] = None) -> None:
+    """
+    Downsample finished hours into station_history_hourly, then apply retention:
+    - raw rows older than HISTORY_RAW_RETENTION_DAYS are dropped
+    - hourly rows older than HISTORY_HOURLY_RETENTION_DAYS are dropped
+    Every statement is a ts index range scan, committed one hour at a time.
+    """
+    if not is_enabled():
+        return
+
+    now = int(now if now is not None else time())
+    current_hour = now - now % HOUR_SEC
+
+    with _compact_lock:
+        conn = _get_compact_conn()
+        row = conn.execute("SELECT value FROM history_meta WHERE key = 'hourly_until'").fetchone()
+        first = conn.execute("SELECT MIN(ts) FROM station_history").fetchone()[0]
+        first_hour = current_hour if first is None else int(first) - int(first) % HOUR_SEC
+        # 빈 시간대는 건너뜀 (워커가 오래 멈췄다가 돌아와도 한 시간씩 헛돌지 않도록)
+        start = first_hour if row is None else max(int(row[0]), first_hour)
+
+        for hour in range(start, current_hour, HOUR_SEC):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO station_history_hourly
+                    SELECT station_id, ?, COUNT(*),
+                           AVG(bikes), MIN(bikes), MAX(bikes),
+                           AVG(shortage), AVG(congestion),
+                           MAX(reward_rent), MAX(reward_return)
+                    FROM station_history
+                    WHERE ts >= ? AND ts < ?
+                    GROUP BY station_id
+                    """,
+                    (hour, hour, hour + HOUR_SEC),
+                )
+                conn.execute("INSERT OR REPLACE INTO history_meta VALUES ('hourly_until', ?)", (hour + HOUR_SEC,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        raw_cutoff = now - max(settings.HISTORY_RAW_RETENTION_DAYS, 1) * DAY_SEC
+        hourly_cutoff = now - max(settings.HISTORY_HOURLY_RETENTION_DAYS, 1) * DAY_SEC
+        _delete_before(conn, "station_history", raw_cutoff)
+        _delete_before(conn, "station_history_hourly", hourly_cutoff)
+
+
+def query_station_history(
+    station_id: str,
+    since_ts: int,
+    until_ts: Optional[int] = None,
+    resolution: str = "auto",
+) -> List[dict]:
+    """
+    Range query for one station, ordered by ts.
+    resolution: "raw" | "hour" | "auto" (raw if the range is still within raw retention)
+    Returns [] if the store does not exist here (never creates it).
+    """
+    if not is_available():
+        return []
+
+    now = int(time())
+    until_ts = int(until_ts if until_ts is not None else now)
+    if resolution == "auto":
+        raw_floor = now - max(settings.HISTORY_RAW_RETENTION_DAYS, 1) * DAY_SEC
+        resolution = "raw" if since_ts >= raw_floor else "hour"
+
+    if resolution == "raw":
+        sql = (
+            "SELECT ts, bikes, shortage, congestion, reward_rent, reward_return "
+            "FROM station_history WHERE station_id = ? AND ts >= ? AND ts <= ? ORDER BY ts"
+        )
+        cols = ("ts", "bikes", "shortage_score", "congestion_score", "reward_rent", "reward_return")
+    elif resolution == "hour":
+        sql = (
+            "SELECT ts, samples, bikes, bikes_min, bikes_max, shortage, congestion, reward_rent, reward_return "
+            "FROM station_history_hourly WHERE station_id = ? AND ts >= ? AND ts <= ? ORDER BY ts"
+        )
+        cols = (
+            "ts", "samples", "bikes", "bikes_min", "bikes_max",
+            "shortage_score", "congestion_score", "reward_rent", "reward_return",
+        )
+    else:
+        raise ValueError(f"unknown resolution: {resolution}")
+
+    with _lock:
+        try:
+            rows = _get_read_conn().execute(sql, (station_id, int(since_ts), until_ts)).fetchall()
+        except sqlite3.OperationalError:
+            # file exists but the writer hasn't created the tables yet
+            logger.exception("history query failed")
+            return []
+    return [dict(zip(cols, r)) for r in rows]
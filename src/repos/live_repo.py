@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import logging
+import os
+import random
+import time
+import zlib
+from typing import Any, Dict, Iterable, Optional
+
+from src.integrations.tashu_client import fetch_live_status
+from src.repos.stations_repo import Station
+
+logger = logging.getLogger(__name__)
+
+MOCK_TICK_SEC = 20  # mock 데이터가 바뀌는 주기
+
+
+def get_live_mode() -> str:
+    return os.getenv("LIVE_MODE", "mock").lower()
+
+
+def snapshot_tick(now: Optional[float] = None) -> int:
+    return int((now if now is not None else time.time()) // MOCK_TICK_SEC)
+
+
+def snapshot_version(live_mode: str, tick: Optional[int] = None) -> str:
+    """
+    입력 데이터(live/mock bikes)가 바뀌는 단위. 캐시 키에 넣어서 새 tick이면 무조건 miss.
+    """
+    return f"{live_mode}:{tick if tick is not None else snapshot_tick()}"
+
+
+def mock_bikes(station_id: str, capacity: int, tick: Optional[int] = None) -> int:
+    """
+    대여소별 bikes를 '시간에 따라 조금씩 변하는' 가짜 데이터로 생성.
+    - 같은 station_id는 같은 시점에 항상 같은 값(안정적)
+    - 20초마다 값이 조금씩 바뀜(실시간 느낌)
+    - crc32 사용: hash()는 프로세스마다 달라서 웹/워커 값이 어긋남
+    """
+    t = tick if tick is not None else snapshot_tick()  # 20초 단위로 패턴 변경
+    rnd = random.Random(zlib.crc32(station_id.encode("utf-8")) ^ t)
+    return rnd.randint(0, max(0, int(capacity)))
+
+
+async def fetch_live_dict(live_mode: str) -> Dict[str, Any]:
+    """
+    LIVE_MODE=real 일 때만 실시간 딕셔너리 가져오기.
+    실패하면 {} 반환.
+    """
+    if live_mode != "real":
+        return {}
+
+    try:
+        live = await fetch_live_status()
+        if live is None:
+            return {}
+        return live
+    except Exception:
+        logger.exception("fetch_live_status failed; using empty live dict")
+        return {}
+
+
+def apply_live(
+    stations: Iterable[Station],
+    live_mode: str,
+    live: Dict[str, Any],
+    tick: Optional[int] = None,
+) -> None:
+    """
+    bikes/capacity 결정 (mock or real). 웹과 워커가 점수 계산 전에 똑같이 호출.
+    stations는 list_stations()/get_station() 복사본이어야 함 (in-place 수정).
+    """
+    if live_mode == "mock":
+        t = tick if tick is not None else snapshot_tick()
+        for s in stations:
+            s.bikes = mock_bikes(s.station_id, s.capacity, tick=t)
+        return
+
+    for s in stations:
+        row = live.get(s.station_id)
+        if row is None:
+            continue
+        s.bikes = int(row.get("bikes", s.bikes))
+        if "capacity" in row:
+            s.capacity = int(row.get("capacity", s.capacity))
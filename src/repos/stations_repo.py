@@ -5,7 +5,7 @@ import datetime
 import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 @dataclass
@@ -108,6 +108,7 @@ def _read_csv_stations() -> List[Station]:
 
 # Simple cache to avoid re-reading file on every request
 _STATIONS_CACHE: Optional[List[Station]] = None
+_STATIONS_BY_ID: Optional[Dict[str, Station]] = None
 
 
 def list_stations() -> List[Station]:
@@ -119,11 +120,26 @@ def list_stations() -> List[Station]:
     return [Station(**s.__dict__) for s in _STATIONS_CACHE]
 
 
+def _stations_by_id() -> Dict[str, Station]:
+    global _STATIONS_CACHE, _STATIONS_BY_ID
+    if _STATIONS_BY_ID is None:
+        if _STATIONS_CACHE is None:
+            _STATIONS_CACHE = _read_csv_stations()
+        # first row wins, same as the old linear scan
+        _STATIONS_BY_ID = {}
+        for s in _STATIONS_CACHE:
+            _STATIONS_BY_ID.setdefault(s.station_id, s)
+    return _STATIONS_BY_ID
+
+
 def get_station(station_id: str) -> Optional[Station]:
-    for s in list_stations():
-        if s.station_id == station_id:
-            return s
-    return None
+    s = _stations_by_id().get(station_id)
+    return Station(**s.__dict__) if s else None
+
+
+def has_station(station_id: str) -> bool:
+    # no copy: for hot validation loops (event ingest)
+    return station_id in _stations_by_id()
 
 
 def touch_update() -> str:
@@ -6,3 +6,10 @@ def require_admin_api_key(x_api_key: str | None = Header(default=None, alias="X-
     if not x_api_key or x_api_key != settings.ADMIN_API_KEY:
         raise HTTPException(status_code=401, detail="Unauthorized")
     return True
+
+
+def require_ingest_api_key(x_api_key: str | None = Header(default=None, alias="X-API-Key")):
+    expected = settings.INGEST_API_KEY or settings.ADMIN_API_KEY
+    if not x_api_key or x_api_key != expected:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return True
@@ -0,0 +1,31 @@
+from __future__ import annotations
+import argparse
+from time import time
+
+from src.domain.demand_profiles import BASE_DIR, build_profiles, profile_path
+from src.repos.event_log import iter_events
+
+# 오프라인 배치: 과거 대여/반납 이벤트 -> 요일/시간대별 수요 프로파일
+# usage: python -m src.worker.build_profiles events.csv [--out data/demand_profiles.bin]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build per-station time-of-day demand profiles")
+    parser.add_argument("events", help="event file (.csv / .ndjson) with station_id, ts, kind")
+    # 기본값은 서버가 읽는 위치(DEMAND_PROFILE_PATH, 프로젝트 루트 기준)
+    parser.add_argument("--out", default=str(profile_path() or BASE_DIR / "data" / "demand_profiles.bin"))
+    parser.add_argument("--slot-min", type=int, default=15)
+    parser.add_argument("--tz-offset-min", type=int, default=540, help="local time offset (KST=540)")
+    args = parser.parse_args()
+
+    t0 = time()
+    profiles = build_profiles(iter_events(args.events), slot_min=args.slot_min, tz_offset_min=args.tz_offset_min)
+    profiles.save(args.out)
+    print(
+        f"[profiles] stations={len(profiles.station_ids)} slots={profiles.slots} "
+        f"-> {args.out} ({time() - t0:.1f}s)",
+        flush=True,
+    )
+
+if __name__ == "__main__":
+    main()
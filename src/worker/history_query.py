@@ -0,0 +1,27 @@
+from __future__ import annotations
+import argparse
+import json
+from time import time
+
+from src.repos import history_repo
+
+# 히스토리 파일을 가진 워커에서 실행하는 조회 CLI (NDJSON 출력)
+# usage: python -m src.worker.history_query STATION_ID [--days 7] [--resolution auto|raw|hour]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query station history from the local SQLite store")
+    parser.add_argument("station_id")
+    parser.add_argument("--days", type=float, default=7.0)
+    parser.add_argument("--resolution", choices=("auto", "raw", "hour"), default="auto")
+    args = parser.parse_args()
+
+    if not history_repo.is_available():
+        raise SystemExit(f"history store not found: {history_repo.db_path()}")
+
+    since_ts = int(time() - args.days * 86400)
+    for point in history_repo.query_station_history(args.station_id, since_ts, resolution=args.resolution):
+        print(json.dumps(point, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
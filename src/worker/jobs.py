@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import logging
+import threading
+import uuid
+from collections import deque
+from time import monotonic, sleep, time
+from typing import Deque, Dict, Optional
+
+from src.cache.redis_cache import RedisCache
+from src.worker.tasks import recompute_and_cache
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY = "jobs:recompute:queue"
+PENDING_KEY = "jobs:recompute:pending"
+LAST_KEY = "jobs:recompute:last"
+
+JOB_TTL_SEC = 3600
+# 워커가 죽어도 pending 표시가 영원히 남아 새 요청을 막지 않도록 짧게 둔다
+PENDING_TTL_SEC = 300
+# Lua는 블로킹 pop을 못 하므로 claim 스크립트를 이 간격으로 폴링
+CLAIM_POLL_SEC = 0.5
+# in-process fallback drain thread: idle wake-up interval
+DRAIN_IDLE_SEC = 60.0
+
+_FLOAT_FIELDS = ("enqueued_at", "started_at", "finished_at", "queue_wait_ms", "duration_ms")
+_INT_FIELDS = ("triggers", "stations")
+
+
+JOB_KEY_PREFIX = "jobs:recompute:job:"
+
+
+def _job_key(job_id: str) -> str:
+    return f"{JOB_KEY_PREFIX}{job_id}"
+
+
+# 새 job 생성 또는 대기 중 job에 합류를 한 번에(원자적으로) 처리
+# KEYS: pending, queue, last / ARGV: job_id, job_key_prefix, enqueued_at, pending_ttl, job_ttl
+# returns {job_id, coalesced(0/1)}
+_ENQUEUE_LUA = """
+local pending = redis.call('GET', KEYS[1])
+if pending then
+  local pk = ARGV[2] .. pending
+  if redis.call('EXISTS', pk) == 1 then
+    redis.call('HINCRBY', pk, 'triggers', 1)
+    return {pending, 1}
+  end
+end
+local jk = ARGV[2] .. ARGV[1]
+redis.call('HSET', jk, 'job_id', ARGV[1], 'status', 'queued', 'enqueued_at', ARGV[3], 'triggers', 1)
+redis.call('EXPIRE', jk, ARGV[5])
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[4])
+redis.call('SET', KEYS[3], ARGV[1], 'EX', ARGV[5])
+redis.call('LPUSH', KEYS[2], ARGV[1])
+return {ARGV[1], 0}
+"""
+
+# 가장 오래된 job을 꺼내고, 남은 대기 id는 전부 이 job에 병합하고 pending 해제 (한 번에)
+# (워커가 죽어 있는 동안 PENDING_TTL이 지나 쌓인 id들을 연속 재계산하지 않도록)
+# KEYS: queue, pending / ARGV: job_key_prefix, job_ttl
+# returns {job_id, merged_count} or nil when the queue is empty
+_CLAIM_LUA = """
+local job_id = redis.call('RPOP', KEYS[1])
+if not job_id then
+  return nil
+end
+local rest = redis.call('LRANGE', KEYS[1], 0, -1)
+redis.call('DEL', KEYS[1])
+redis.call('DEL', KEYS[2])
+local extra = 0
+for _, id in ipairs(rest) do
+  local k = ARGV[1] .. id
+  extra = extra + tonumber(redis.call('HGET', k, 'triggers') or '1')
+  redis.call('HSET', k, 'status', 'merged', 'merged_into', job_id)
+  redis.call('EXPIRE', k, ARGV[2])
+end
+if extra > 0 then
+  local jk = ARGV[1] .. job_id
+  redis.call('HINCRBY', jk, 'triggers', extra)
+  redis.call('EXPIRE', jk, ARGV[2])
+end
+return {job_id, #rest}
+"""
+
+
+class RecomputeJobQueue:
+    """
+    On-demand recompute queue.
+    - Redis enabled: list(QUEUE_KEY) + hash per job, shared by web/worker processes
+    - Redis disabled: in-process deque, run by a daemon drain thread in the web process
+    Duplicate triggers while a job is still queued are coalesced into that job;
+    when the worker picks a job, any other queued ids are merged into it (status "merged").
+    """
+    def __init__(self, cache: Optional[RedisCache] = None):
+        self._cache = cache or RedisCache()
+        self._cond = threading.Condition()
+        self._run_lock = threading.Lock()
+        self._queue: Deque[str] = deque()
+        self._jobs: Dict[str, dict] = {}
+        self._pending: Optional[str] = None
+        self._last: Optional[str] = None
+        self._drainer: Optional[threading.Thread] = None
+        # EVALSHA: 0.5초마다 폴링해도 스크립트 본문을 매번 보내지 않음
+        self._enqueue_script = self._cache.register_script(_ENQUEUE_LUA)
+        self._claim_script = self._cache.register_script(_CLAIM_LUA)
+
+    def is_shared(self) -> bool:
+        return self._cache.is_enabled()
+
+    def enqueue(self) -> dict:
+        """
+        Queue a recompute, or join the one already waiting.
+        Returns the job record (with coalesced=True if it was joined).
+        """
+        job_id = uuid.uuid4().hex[:12]
+        record = {"job_id": job_id, "status": "queued", "enqueued_at": time(), "triggers": 1}
+
+        if self.is_shared():
+            res_id, coalesced = self._enqueue_script(
+                keys=[PENDING_KEY, QUEUE_KEY, LAST_KEY],
+                args=[job_id, JOB_KEY_PREFIX, record["enqueued_at"], PENDING_TTL_SEC, JOB_TTL_SEC],
+            )
+            return {**(self.get(res_id) or {"job_id": res_id}), "coalesced": bool(coalesced)}
+
+        with self._cond:
+            if self._pending is not None:
+                existing = self._jobs[self._pending]
+                existing["triggers"] += 1
+                return {**existing, "coalesced": True}
+
+            self._jobs[job_id] = record
+            self._pending = job_id
+            self._last = job_id
+            self._queue.append(job_id)
+            self._cond.notify()
+            self._ensure_drainer()
+            return {**record, "coalesced": False}
+
+    def _ensure_drainer(self) -> None:
+        # Redis가 없으면 워커 프로세스도 큐를 못 보므로 이 프로세스가 직접 실행
+        if self._drainer is None or not self._drainer.is_alive():
+            self._drainer = threading.Thread(target=self._drain_forever, name="recompute-drain", daemon=True)
+            self._drainer.start()
+
+    def _drain_forever(self) -> None:
+        while True:
+            job_id = self.wait_for_job(DRAIN_IDLE_SEC)
+            if job_id is not None:
+                self.run_job(job_id)
+
+    def wait_for_job(self, timeout_sec: float) -> Optional[str]:
+        """
+        Block up to timeout_sec for the next queued job id (None on timeout).
+        """
+        if self.is_shared():
+            deadline = monotonic() + max(0.0, timeout_sec)
+            while True:
+                claimed = self._claim_script(
+                    keys=[QUEUE_KEY, PENDING_KEY],
+                    args=[JOB_KEY_PREFIX, JOB_TTL_SEC],
+                )
+                if claimed:
+                    job_id, merged = claimed
+                    if merged:
+                        logger.info("recompute job %s absorbed %s stale queued job(s)", job_id, merged)
+                    return job_id
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    return None
+                sleep(min(CLAIM_POLL_SEC, remaining))
+
+        with self._cond:
+            if not self._cond.wait_for(lambda: bool(self._queue), timeout=max(0.0, timeout_sec)):
+                return None
+            job_id = self._queue.popleft()
+            if self._pending == job_id:
+                self._pending = None
+            return job_id
+
+    def _update(self, job_id: str, **fields) -> None:
+        if self.is_shared():
+            self._cache.hset_with_ttl(_job_key(job_id), fields, ttl_sec=JOB_TTL_SEC)
+            return
+        with self._cond:
+            self._jobs.setdefault(job_id, {"job_id": job_id}).update(fields)
+
+    def get(self, job_id: Optional[str] = None) -> Optional[dict]:
+        """
+        Job record by id; latest job when job_id is None.
+        """
+        if not self.is_shared():
+            with self._cond:
+                job_id = job_id or self._last
+                rec = self._jobs.get(job_id) if job_id else None
+                return dict(rec) if rec else None
+
+        job_id = job_id or self._cache.get_str(LAST_KEY)
+        if not job_id:
+            return None
+        raw = self._cache.hgetall(_job_key(job_id))
+        if not raw:
+            return None
+
+        rec: dict = dict(raw)
+        for k in _FLOAT_FIELDS:
+            if k in rec:
+                rec[k] = float(rec[k])
+        for k in _INT_FIELDS:
+            if k in rec:
+                rec[k] = int(rec[k])
+        return rec
+
+    def run_job(self, job_id: str, ttl_sec: int = 90) -> Optional[dict]:
+        """
+        Execute a dequeued job and record its timings.
+        Runs are serialized so concurrent triggers never recompute in parallel.
+        """
+        with self._run_lock:
+            rec = self.get(job_id) or {}
+            started_at = time()
+            enqueued_at = float(rec.get("enqueued_at", started_at))
+            self._update(
+                job_id,
+                status="running",
+                started_at=started_at,
+                queue_wait_ms=round((started_at - enqueued_at) * 1000, 1),
+            )
+
+            try:
+                # in-process fallback runs inside the web process: don't fork a pool there
+                result = recompute_and_cache(ttl_sec=ttl_sec, parallel=self.is_shared())
+            except Exception as e:
+                logger.exception("recompute job %s failed", job_id)
+                finished_at = time()
+                self._update(
+                    job_id,
+                    status="failed",
+                    finished_at=finished_at,
+                    duration_ms=round((finished_at - started_at) * 1000, 1),
+                    error=str(e),
+                )
+                return self.get(job_id)
+
+            finished_at = time()
+            self._update(
+                job_id,
+                status="done",
+                finished_at=finished_at,
+                duration_ms=round((finished_at - started_at) * 1000, 1),
+                updated_at=result["updated_at"],
+                stations=result["stations"],
+            )
+            return self.get(job_id)
+
+
+recompute_queue = RecomputeJobQueue()
@@ -1,14 +1,27 @@
 from __future__ import annotations
 import time
+from src.worker.jobs import recompute_queue
 from src.worker.tasks import recompute_and_cache
 
 INTERVAL_SEC = 60  # 1 minute
+CACHE_TTL_SEC = 90
 
 def main():
+    next_at = 0.0
     while True:
-        result = recompute_and_cache(ttl_sec=90)
-        print("[worker] recomputed:", result, flush=True)
-        time.sleep(INTERVAL_SEC)
+        # 주기 사이에는 on-demand job을 기다리다가, 들어오면 바로 실행
+        wait = next_at - time.time()
+        job_id = recompute_queue.wait_for_job(wait) if wait > 0 else None
+
+        if job_id:
+            job = recompute_queue.run_job(job_id, ttl_sec=CACHE_TTL_SEC)
+            print("[worker] on-demand job:", job, flush=True)
+        else:
+            result = recompute_and_cache(ttl_sec=CACHE_TTL_SEC)
+            print("[worker] recomputed:", result, flush=True)
+
+        # 방금 캐시가 갱신됐으니 다음 주기는 지금부터 다시 센다
+        next_at = time.time() + INTERVAL_SEC
 
 if __name__ == "__main__":
     main()
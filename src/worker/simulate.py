@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import random
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from time import time
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from src.config import settings
+from src.domain.incentives import compute_route_free_minutes, compute_station_rewards, haversine_km
+from src.domain.scoring import StationState, compute_scores_many
+from src.repos.event_log import iter_events
+from src.repos.stations_repo import Station, list_stations
+
+# 오프라인 what-if 시뮬레이터: 하루치 대여/반납 이벤트를 재생하면서
+# 파라미터 조합별로 불균형 감소량과 지급 무료분을 비교한다.
+# usage: python -m src.worker.simulate events.csv --alpha 12,18,24 --route-k 10,14 --out sim.ndjson
+
+
+@dataclass(frozen=True)
+class SimParams:
+    alpha: float
+    beta: float
+    route_k: float
+    f_low: float
+    f_high: float
+
+
+@dataclass(frozen=True)
+class SimOptions:
+    tick_min: int = 5
+    init_fill: float = 0.5
+    compliance: float = 0.5   # P(shift) = compliance * extra free_min offered / MAX_FREE_MIN
+    ref_f_low: float = 0.20   # fixed thresholds for the imbalance metric (comparable across runs)
+    ref_f_high: float = 0.80
+    seed: int = 42
+
+
+# (ts, station_index, is_rent)
+Event = Tuple[float, int, bool]
+
+# per-process replay context (set once by the pool initializer)
+_ctx: Dict[str, object] = {}
+
+
+def _init_context(
+    stations: List[Station],
+    events: List[Event],
+    neighbors: List[List[Tuple[int, float]]],
+    opts: SimOptions,
+) -> None:
+    _ctx.update(stations=stations, events=events, neighbors=neighbors, opts=opts)
+
+
+def build_neighbors(stations: List[Station], radius_km: float, k: int) -> List[List[Tuple[int, float]]]:
+    """
+    k nearest stations within radius_km for each station (grid-bucketed, not O(n^2)).
+    """
+    cell = max(radius_km / 111.0, 1e-4)  # ~deg per km (lat); good enough for bucketing
+    grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    for i, s in enumerate(stations):
+        grid[(int(s.lat // cell), int(s.lon // cell))].append(i)
+
+    out: List[List[Tuple[int, float]]] = []
+    for i, s in enumerate(stations):
+        gy, gx = int(s.lat // cell), int(s.lon // cell)
+        cand: List[Tuple[int, float]] = []
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                for j in grid.get((gy + dy, gx + dx), ()):
+                    if j == i:
+                        continue
+                    km = haversine_km(s.lat, s.lon, stations[j].lat, stations[j].lon)
+                    if km <= radius_km:
+                        cand.append((j, km))
+        cand.sort(key=lambda x: x[1])
+        out.append(cand[:k])
+    return out
+
+
+def _imbalance(caps: List[int], bikes: List[int], lo: float, hi: float) -> float:
+    total = 0.0
+    n = 0
+    for c, b in zip(caps, bikes):
+        if c <= 0:
+            continue
+        total += (max(0.0, lo * c - b) + max(0.0, b - hi * c)) / c
+        n += 1
+    return total / max(n, 1)
+
+
+def _best_shift(here: int, cands: Sequence[Tuple[int, float]], value: Callable[[int], float]) -> Tuple[int, float]:
+    """
+    Neighbor whose incentive beats staying at `here` by the most -> (station, gain); (here, 0) if none.
+    value(x) < 0 marks a station that can't serve the rider (empty / full).
+    """
+    base = max(value(here), 0)
+    best, best_gain = here, 0.0
+    for d, _ in cands:
+        v = value(d)
+        if v >= 0 and v - base > best_gain:
+            best, best_gain = d, v - base
+    return best, best_gain
+
+
+def _route_minutes(
+    stations: List[Station], congestion: List[float], shortage: List[float], origin: int, dest: int
+) -> int:
+    # /route와 같은 의미: 출발(대여) 대여소의 혼잡도 x 도착 대여소의 부족도
+    if origin < 0 or origin == dest:
+        return 0
+    km = haversine_km(stations[origin].lat, stations[origin].lon, stations[dest].lat, stations[dest].lon)
+    return compute_route_free_minutes(congestion[origin], shortage[dest], km)[0]
+
+
+def _apply_params(p: SimParams) -> None:
+    settings.ALPHA = p.alpha
+    settings.BETA = p.beta
+    settings.ROUTE_K = p.route_k
+    settings.F_LOW = p.f_low
+    settings.F_HIGH = p.f_high
+
+
+def run_simulation(params: Optional[SimParams]) -> dict:
+    """
+    Replay the context's events once. params=None is the no-incentive baseline.
+    """
+    stations: List[Station] = _ctx["stations"]  # type: ignore[assignment]
+    events: List[Event] = _ctx["events"]  # type: ignore[assignment]
+    neighbors: List[List[Tuple[int, float]]] = _ctx["neighbors"]  # type: ignore[assignment]
+    opts: SimOptions = _ctx["opts"]  # type: ignore[assignment]
+
+    t0 = time()
+    if params is not None:
+        _apply_params(params)
+
+    n = len(stations)
+    ids = [s.station_id for s in stations]
+    caps = [s.capacity for s in stations]
+    bikes = [int(round(c * opts.init_fill)) for c in caps]
+    rents_w = [0] * n
+    returns_w = [0] * n
+    shortage = [0.0] * n
+    congestion = [0.0] * n
+    reward_rent = [0] * n
+    reward_return = [0] * n
+
+    rnd = random.Random(opts.seed)
+    tick_sec = max(opts.tick_min, 1) * 60
+    window_sec = max(settings.WINDOW_MIN, 1) * 60
+    max_free = max(settings.MAX_FREE_MIN, 1)
+
+    free_minutes = 0
+    redirected = 0
+    shifted_rents = 0
+    unmet_rents = 0
+    unmet_returns = 0
+    imbalance_sum = 0.0
+    ticks = 0
+
+    # (ts, station, is_rent) actually counted, for sliding the window counters
+    window: Deque[Event] = deque()
+    # origins of rentals not yet returned (for the route incentive on return)
+    in_transit: List[int] = []
+
+    i = 0
+    total = len(events)
+    t = events[0][0] - events[0][0] % tick_sec if events else 0.0
+
+    while i < total:
+        # slide the WINDOW_MIN counters (same thing Redis TTL keys do live)
+        while window and window[0][0] < t - window_sec:
+            _, k, is_rent = window.popleft()
+            if is_rent:
+                rents_w[k] -= 1
+            else:
+                returns_w[k] -= 1
+
+        # worker recompute at this tick
+        if params is not None:
+            scores = compute_scores_many(
+                [StationState(caps[k], bikes[k], rents_w[k], returns_w[k], station_id=ids[k]) for k in range(n)],
+                now=t,
+            )
+            for k, (sh, co) in enumerate(scores):
+                shortage[k], congestion[k] = sh, co
+                reward_rent[k], reward_return[k] = compute_station_rewards(sh, co)
+
+        imbalance_sum += _imbalance(caps, bikes, opts.ref_f_low, opts.ref_f_high)
+        ticks += 1
+
+        t_next = t + tick_sec
+        while i < total and events[i][0] < t_next:
+            ts, k, is_rent = events[i]
+            i += 1
+
+            if is_rent:
+                src = k
+                if params is not None:
+                    # 혼잡 대여소 대여 인센티브(reward_rent)가 더 크면 근처에서 대신 빌림
+                    d, gain = _best_shift(k, neighbors[k], lambda x: reward_rent[x] if bikes[x] > 0 else -1)
+                    if d != k and rnd.random() < opts.compliance * gain / max_free:
+                        src = d
+                        shifted_rents += 1
+                if bikes[src] > 0:
+                    bikes[src] -= 1
+                    rents_w[src] += 1
+                    window.append((ts, src, True))
+                    free_minutes += reward_rent[src]
+                    in_transit.append(src)
+                else:
+                    unmet_rents += 1
+                continue
+
+            origin = -1
+            if in_transit:
+                # 이벤트에 trip 연결이 없으므로 진행 중인 대여 하나를 임의로 골라 출발지로 봄
+                j = rnd.randrange(len(in_transit))
+                in_transit[j], in_transit[-1] = in_transit[-1], in_transit[j]
+                origin = in_transit.pop()
+
+            dest = k
+            if params is not None:
+                # 반납 인센티브 + (출발지 혼잡도 기준) 이동 인센티브가 더 큰 근처 대여소로 반납
+                d, gain = _best_shift(
+                    k,
+                    neighbors[k],
+                    lambda x: reward_return[x] + _route_minutes(stations, congestion, shortage, origin, x)
+                    if bikes[x] < caps[x] else -1,
+                )
+                if d != k and rnd.random() < opts.compliance * gain / max_free:
+                    dest = d
+                    redirected += 1
+
+            if bikes[dest] < caps[dest]:
+                bikes[dest] += 1
+                returns_w[dest] += 1
+                window.append((ts, dest, False))
+                free_minutes += reward_return[dest]
+                if params is not None:
+                    free_minutes += _route_minutes(stations, congestion, shortage, origin, dest)
+            else:
+                unmet_returns += 1
+
+        t = t_next
+
+    return {
+        "params": asdict(params) if params is not None else None,
+        "imbalance": imbalance_sum / max(ticks, 1),
+        "free_minutes": free_minutes,
+        "redirected_returns": redirected,
+        "shifted_rents": shifted_rents,
+        "unmet_rents": unmet_rents,
+        "unmet_returns": unmet_returns,
+        "ticks": ticks,
+        "elapsed_sec": round(time() - t0, 2),
+    }
+
+
+def load_events(path: str, stations: List[Station]) -> Tuple[List[Event], int]:
+    """
+    Read + sort events, mapped onto registry indices. Returns (events, skipped_unknown).
+    """
+    index = {s.station_id: i for i, s in enumerate(stations)}
+    events: List[Event] = []
+    skipped = 0
+    for station_id, ts, kind in iter_events(path):
+        k = index.get(station_id)
+        if k is None:
+            skipped += 1
+            continue
+        events.append((ts, k, kind == "rent"))
+    events.sort(key=lambda e: e[0])
+    return events, skipped
+
+
+def _floats(v: str) -> List[float]:
+    return [float(x) for x in v.split(",") if x.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="What-if incentive simulator (event replay, parallel grid)")
+    parser.add_argument("events", help="event file (.csv / .ndjson) with station_id, ts, kind")
+    parser.add_argument("--out", default="sim_results.ndjson", help="one JSON line per parameter set")
+    parser.add_argument("--alpha", type=_floats, default=[settings.ALPHA])
+    parser.add_argument("--beta", type=_floats, default=[settings.BETA])
+    parser.add_argument("--route-k", type=_floats, default=[settings.ROUTE_K])
+    parser.add_argument("--f-low", type=_floats, default=[settings.F_LOW])
+    parser.add_argument("--f-high", type=_floats, default=[settings.F_HIGH])
+    parser.add_argument("--tick-min", type=int, default=5)
+    parser.add_argument("--init-fill", type=float, default=0.5)
+    parser.add_argument("--compliance", type=float, default=0.5)
+    parser.add_argument("--radius-km", type=float, default=2.0)
+    parser.add_argument("--neighbors", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    stations = list_stations()
+    events, skipped = load_events(args.events, stations)
+    if not events:
+        raise SystemExit("no events matched the station registry")
+
+    opts = SimOptions(
+        tick_min=args.tick_min,
+        init_fill=args.init_fill,
+        compliance=args.compliance,
+        ref_f_low=settings.F_LOW,
+        ref_f_high=settings.F_HIGH,
+        seed=args.seed,
+    )
+    neighbors = build_neighbors(stations, args.radius_km, args.neighbors)
+
+    grid = [
+        SimParams(a, b, k, lo, hi)
+        for a, b, k, lo, hi in itertools.product(args.alpha, args.beta, args.route_k, args.f_low, args.f_high)
+        if lo < hi
+    ]
+    print(
+        f"[sim] stations={len(stations)} events={len(events)} (skipped {skipped}) "
+        f"param_sets={len(grid)} workers={args.workers}",
+        flush=True,
+    )
+
+    _init_context(stations, events, neighbors, opts)
+    baseline = run_simulation(None)
+    base_imb = baseline["imbalance"]
+    print(f"[sim] baseline imbalance={base_imb:.4f} ({baseline['elapsed_sec']}s)", flush=True)
+
+    with open(args.out, "w", encoding="utf-8") as out:
+        out.write(json.dumps({"baseline": True, **baseline}) + "\n")
+
+        with ProcessPoolExecutor(
+            max_workers=max(args.workers, 1),
+            initializer=_init_context,
+            initargs=(stations, events, neighbors, opts),
+        ) as pool:
+            futures = [pool.submit(run_simulation, p) for p in grid]
+            for fut in as_completed(futures):
+                r = fut.result()
+                r["imbalance_reduction"] = (base_imb - r["imbalance"]) / base_imb if base_imb > 0 else 0.0
+                out.write(json.dumps(r) + "\n")
+                out.flush()
+                print(
+                    f"[sim] {r['params']} reduction={r['imbalance_reduction']:+.2%} "
+                    f"free_min={r['free_minutes']} redirected={r['redirected_returns']} "
+                    f"shifted_rents={r['shifted_rents']}",
+                    flush=True,
+                )
+
+    print(f"[sim] results -> {args.out}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
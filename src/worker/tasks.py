@@ -1,26 +1,110 @@
 from __future__ import annotations
+import asyncio
 import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from time import time
+from typing import Dict, List, Optional, Tuple
 
 from src.cache.redis_cache import RedisCache
-from src.repos.stations_repo import list_stations, touch_update
-from src.repos.events_repo import get_window_counts
-from src.domain.scoring import StationState, compute_scores
+from src.config import settings
+from src.repos.stations_repo import Station, list_stations, touch_update
+from src.repos.events_repo import get_window_counts_many
+from src.repos.live_repo import apply_live, fetch_live_dict, get_live_mode, snapshot_tick, snapshot_version
+from src.repos import history_repo
+from src.domain.scoring import StationState, compute_scores_many
 from src.domain.incentives import compute_station_rewards
 
 _cache = RedisCache()
+logger = logging.getLogger(__name__)
 
-def recompute_and_cache(ttl_sec: int = 30) -> dict:
+SHARD_KEY_PREFIX = "public:stations_cache:region:"
+MANIFEST_KEY = "public:stations_cache:manifest"
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+# Redis가 없으면(in-process fallback) 발행 결과를 이 프로세스 안에 둔다: 같은 프로세스의 API가 읽음
+# key -> (expires_at, raw JSON). 발행할 때마다 통째로 교체
+_local_published: Dict[str, Tuple[float, str]] = {}
+_local_lock = threading.Lock()
+
+
+def publish_version(live_mode: str, tick: int, published_at: float) -> str:
+    # 워커 실행 1회 = 버전 1개. manifest가 가리키는 버전의 shard만 읽으므로 서로 섞이지 않음
+    return f"{snapshot_version(live_mode, tick)}:{int(published_at * 1000)}"
+
+
+def shard_key(version: str, region_id: str) -> str:
+    return f"{SHARD_KEY_PREFIX}{version}:{region_id}"
+
+
+def _publish(items: Dict[str, str], ttl_sec: int) -> None:
+    if _cache.is_enabled():
+        # manifest는 마지막에 써서, manifest가 가리키는 shard는 항상 존재하도록
+        for key, raw in items.items():
+            _cache.set_json(key, raw, ttl_sec=ttl_sec)
+        return
+    global _local_published
+    expires_at = time() + ttl_sec
+    with _local_lock:
+        _local_published = {key: (expires_at, raw) for key, raw in items.items()}
+
+
+def get_published_many(keys: List[str]) -> List[Optional[str]]:
     """
-    Recompute station outputs and optionally cache in Redis.
+    Raw JSON published by recompute_and_cache (Redis, or this process in the fallback).
     """
-    updated_at = touch_update()
+    if _cache.is_enabled():
+        return _cache.get_strs(keys)
+    now = time()
+    with _local_lock:
+        hits = [_local_published.get(k) for k in keys]
+    return [h[1] if h is not None and h[0] > now else None for h in hits]
+
+
+def get_published_manifest(live_mode: str, now: Optional[float] = None) -> Optional[dict]:
+    """
+    Latest manifest the worker published, if it was built in the same live mode
+    and is at most PUBLISHED_MAX_AGE_SEC old (None -> caller computes on the fly).
+    """
+    raw = get_published_many([MANIFEST_KEY])[0]
+    if raw is None:
+        return None
+    manifest = json.loads(raw)
+    age = (now if now is not None else time()) - float(manifest.get("published_at", 0))
+    if manifest.get("live_mode") != live_mode or age > settings.PUBLISHED_MAX_AGE_SEC:
+        return None
+    return manifest
+
+
+def _worker_processes() -> int:
+    return settings.WORKER_PROCESSES if settings.WORKER_PROCESSES > 0 else (os.cpu_count() or 1)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    # 매 주기마다 프로세스를 새로 띄우지 않도록 재사용
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=_worker_processes())
+    return _pool
+
+
+def compute_shard(region_id: str, stations: List[Station], updated_at: str) -> Tuple[str, List[dict]]:
+    """
+    Recompute one region (runs in a pool process). Returns (region_id, payload).
+    """
+    counts = get_window_counts_many([s.station_id for s in stations])
+    states = [
+        StationState(s.capacity, s.bikes, rents, returns, station_id=s.station_id)
+        for s, (rents, returns) in zip(stations, counts)
+    ]
+    scores = compute_scores_many(states)
     payload = []
 
-    for s in list_stations():
-        rents, returns = get_window_counts(s.station_id)
-        state = StationState(s.capacity, s.bikes, rents, returns)
-        shortage_score, congestion_score = compute_scores(state)
+    for s, (shortage_score, congestion_score) in zip(stations, scores):
         reward_rent, reward_return = compute_station_rewards(shortage_score, congestion_score)
 
         payload.append({
@@ -38,7 +122,76 @@ def recompute_and_cache(ttl_sec: int = 30) -> dict:
             "updated_at": updated_at,
         })
 
-    if _cache.is_enabled():
-        _cache.set_json("public:stations_cache", json.dumps(payload), ttl_sec=ttl_sec)
+    return region_id, payload
+
+
+def recompute_and_cache(ttl_sec: int = 30, parallel: bool = True) -> dict:
+    """
+    Recompute station outputs per region shard and publish them
+    (Redis, or in-process when Redis is disabled):
+    - one JSON entry per region (shard_key(version, region_id)), version = publish_version()
+    - a manifest with version/tick/published_at + per-region summary (RegionOut fields) + shard keys
+    bikes come from the same mock/live overlay the public API uses.
+    """
+    t0 = time()
+    updated_at = touch_update()
+
+    live_mode = get_live_mode()
+    tick = snapshot_tick()
+    live = asyncio.run(fetch_live_dict(live_mode)) if live_mode == "real" else {}
+
+    stations = list_stations()
+    apply_live(stations, live_mode, live, tick=tick)
+
+    shards: Dict[str, List[Station]] = defaultdict(list)
+    for s in stations:
+        shards[s.region_id].append(s)
+
+    if parallel and len(shards) > 1 and _worker_processes() > 1:
+        pool = _get_pool()
+        futures = [pool.submit(compute_shard, rid, sts, updated_at) for rid, sts in shards.items()]
+        results = [f.result() for f in futures]
+    else:
+        results = [compute_shard(rid, sts, updated_at) for rid, sts in shards.items()]
+
+    published_at = time()
+    version = publish_version(live_mode, tick, published_at)
+    regions = {}
+    for region_id, payload in results:
+        n = max(len(payload), 1)
+        regions[region_id] = {
+            "region_id": region_id,
+            "shortage": sum(p["shortage_score"] for p in payload) / n,
+            "congestion": sum(p["congestion_score"] for p in payload) / n,
+            "stations": len(payload),
+            "key": shard_key(version, region_id),
+        }
+
+    items = {shard_key(version, region_id): json.dumps(payload) for region_id, payload in results}
+    items[MANIFEST_KEY] = json.dumps({
+        "version": version,
+        "live_mode": live_mode,
+        "tick": tick,
+        "published_at": published_at,
+        "updated_at": updated_at,
+        "regions": list(regions.values()),
+    })
+    _publish(items, ttl_sec=ttl_sec)
+
+    total = sum(r["stations"] for r in regions.values())
+
+    # 히스토리는 부가 기능: 실패해도 캐시 갱신은 유지
+    try:
+        history_repo.append_snapshot(
+            (p for _, payload in results for p in payload), ts=int(time())
+        )
+    except Exception:
+        logger.exception("history append failed")
 
-    return {"updated_at": updated_at, "stations": len(payload)}
+    return {
+        "updated_at": updated_at,
+        "version": version,
+        "stations": total,
+        "regions": len(regions),
+        "elapsed_ms": round((time() - t0) * 1000, 1),
+    }
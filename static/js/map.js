@@ -5,9 +5,16 @@ L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
   attribution: '&copy; OpenStreetMap contributors'
 }).addTo(map);
 
-const markerLayer = L.layerGroup().addTo(map);
+// SVG 대신 canvas 하나에 모든 마커를 그림 (대여소 수천~만 개 대응)
+const canvasRenderer = L.canvas({ padding: 0.5 });
+const markerLayer = L.layerGroup().addTo(map);   // 개별 대여소 마커 (station_id로 재사용)
+const clusterLayer = L.layerGroup().addTo(map);  // 줌아웃 시 격자 클러스터
 let heatLayer = null;
 
+const CLUSTER_MAX_ZOOM = 15;  // 이 줌 미만에서는 클러스터로 표시
+const CLUSTER_CELL_PX = 60;
+const sharedPopup = L.popup();
+
 const statusEl = document.getElementById('status');
 const toggleHeat = document.getElementById('toggleHeat');
 
@@ -17,6 +24,9 @@ const routeBox = document.getElementById('routeBox');
 const resetBtn = document.getElementById('resetSel');
 
 let stationsById = new Map();
+const markersById = new Map();
+const dirtyIds = new Set();
+let lastUpdatedAt = '';
 let selectedFrom = null;
 let selectedTo = null;
 
@@ -50,7 +60,7 @@ function popupHtml(st){
       <hr style="border:none;border-top:1px solid #eee;margin:8px 0"/>
       <div>인센티브(반납): <b>${st.reward_return}</b>분</div>
       <div>인센티브(대여): <b>${st.reward_rent}</b>분</div>
-      <div style="margin-top:6px;color:#666;font-size:12px">updated: ${st.updated_at}</div>
+      <div style="margin-top:6px;color:#666;font-size:12px">updated: ${lastUpdatedAt || st.updated_at}</div>
       <div style="margin-top:8px;color:#111;font-size:12px">
         <b>팁:</b> 대여소 두 개를 클릭하면 “과잉→부족 이동” 인센티브를 계산합니다.
       </div>
@@ -62,13 +72,81 @@ function setRouteBox(text){
   routeBox.textContent = text;
 }
 
+let stationsWorker = null;
+let workerSeq = 0;
+const workerPending = new Map();
+
+// 워커 로드/실행/메시지 역직렬화 실패 시: 대기 중인 요청을 모두 reject하고 메인 스레드 경로로 전환
+function disableStationsWorker(reason){
+  if (!stationsWorker) return;
+  console.warn('stations worker disabled, falling back to main thread:', reason);
+  stationsWorker.terminate();
+  stationsWorker = null;
+  const err = new Error(`stations worker failed: ${reason}`);
+  for (const p of workerPending.values()) p.reject(err);
+  workerPending.clear();
+}
+
+if (window.Worker){
+  try {
+    stationsWorker = new Worker('/static/js/stations-worker.js?v=1');
+  } catch (e) {
+    stationsWorker = null;
+  }
+}
+
+if (stationsWorker){
+  stationsWorker.onmessage = (ev) => {
+    const msg = ev.data;
+    const p = workerPending.get(msg.seq);
+    if (!p) return;
+    workerPending.delete(msg.seq);
+    if (msg.ok) p.resolve(msg);
+    else p.reject(new Error(msg.error));
+  };
+  stationsWorker.onerror = (ev) => {
+    ev.preventDefault();
+    disableStationsWorker(ev.message || 'error');
+  };
+  stationsWorker.onmessageerror = () => {
+    disableStationsWorker('messageerror');
+  };
+}
+
+function postToStationsWorker(){
+  const seq = ++workerSeq;
+  return new Promise((resolve, reject) => {
+    workerPending.set(seq, { resolve, reject });
+    stationsWorker.postMessage({ seq, url: '/api/public/stations' });
+  });
+}
+
+// JSON 다운로드/파싱/diff는 Web Worker에서 (미지원 브라우저/워커 장애 시 메인 스레드 fallback)
 async function fetchStations(){
+  if (stationsWorker){
+    try {
+      return await postToStationsWorker();
+    } catch (e) {
+      // 일반 HTTP 에러는 그대로 올리고, 워커 자체가 죽은 경우만 아래 경로로 재시도
+      if (stationsWorker) throw e;
+    }
+  }
+
   const res = await fetch('/api/public/stations');
   if (!res.ok) {
     const text = await res.text();
     throw new Error(`${res.status} ${text}`);
   }
-  return await res.json();
+  const stations = await res.json();
+  const ids = new Set(stations.map(st => st.station_id));
+  const removed = [...stationsById.keys()].filter(id => !ids.has(id));
+  return {
+    full: true,
+    changed: stations,
+    removed,
+    total: stations.length,
+    updatedAt: stations.length ? stations[stations.length - 1].updated_at : null,
+  };
 }
 
 function clearSelection(){
@@ -137,49 +215,186 @@ async function handleStationClick(st){
 }
 
 
-function renderStations(stations){
-  markerLayer.clearLayers();
-  stationsById.clear();
+function applyUpdate(update){
+  for (const id of update.removed){
+    stationsById.delete(id);
+    const m = markersById.get(id);
+    if (m){
+      markerLayer.removeLayer(m);
+      markersById.delete(id);
+    }
+  }
+  for (const st of update.changed){
+    stationsById.set(st.station_id, st);
+    dirtyIds.add(st.station_id);
+  }
+  if (update.updatedAt) lastUpdatedAt = update.updatedAt;
+}
 
-  const heatPoints = [];
+function openStationPopup(st){
+  // 팝업 HTML은 클릭할 때만 생성
+  sharedPopup
+    .setLatLng([st.lat, st.lon])
+    .setContent(popupHtml(st))
+    .openOn(map);
+}
 
-  for (const st of stations){
-    stationsById.set(st.station_id, st);
+function createMarker(st){
+  const id = st.station_id;
+  const marker = L.circleMarker([st.lat, st.lon], {
+    renderer: canvasRenderer,
+    radius: radiusFor(st),
+    color: colorFor(st),
+    weight: 2,
+    fillOpacity: 0.8
+  });
+  marker.on('click', () => {
+    const cur = stationsById.get(id);
+    if (!cur) return;
+    openStationPopup(cur);
+    handleStationClick(cur);
+  });
+  marker.addTo(markerLayer);
+  markersById.set(id, marker);
+  return marker;
+}
 
-    const marker = L.circleMarker([st.lat, st.lon], {
-      radius: radiusFor(st),
-      color: colorFor(st),
-      weight: 2,
-      fillOpacity: 0.8
-    });
+function updateMarker(marker, st){
+  marker.setLatLng([st.lat, st.lon]);
+  marker.setRadius(radiusFor(st));
+  marker.setStyle({ color: colorFor(st) });
+}
 
-    marker.bindPopup(popupHtml(st));
-    marker.on('click', () => handleStationClick(st));
-    marker.addTo(markerLayer);
+function renderIndividual(bounds){
+  clusterLayer.clearLayers();
 
+  // 화면(+여유) 밖 마커는 제거해서 메모리/그리기 비용을 화면 크기에 비례하게 유지
+  for (const [id, marker] of markersById){
+    const st = stationsById.get(id);
+    if (!st || !bounds.contains([st.lat, st.lon])){
+      markerLayer.removeLayer(marker);
+      markersById.delete(id);
+    }
+  }
+
+  for (const st of stationsById.values()){
+    if (!bounds.contains([st.lat, st.lon])) continue;
+    const marker = markersById.get(st.station_id);
+    if (!marker) createMarker(st);
+    else if (dirtyIds.has(st.station_id)) updateMarker(marker, st);
+  }
+}
+
+function renderClusters(bounds){
+  markerLayer.clearLayers();
+  markersById.clear();
+  clusterLayer.clearLayers();
+
+  const cells = new Map();
+  for (const st of stationsById.values()){
+    if (!bounds.contains([st.lat, st.lon])) continue;
+    const pt = map.latLngToLayerPoint([st.lat, st.lon]);
+    const key = `${Math.floor(pt.x / CLUSTER_CELL_PX)}:${Math.floor(pt.y / CLUSTER_CELL_PX)}`;
+    let c = cells.get(key);
+    if (!c){
+      c = { n: 0, lat: 0, lon: 0, shortage: 0, congestion: 0, first: st };
+      cells.set(key, c);
+    }
+    c.n += 1;
+    c.lat += st.lat;
+    c.lon += st.lon;
+    c.shortage += st.shortage_score ?? 0;
+    c.congestion += st.congestion_score ?? 0;
+  }
+
+  for (const c of cells.values()){
+    if (c.n === 1){
+      const st = c.first;
+      L.circleMarker([st.lat, st.lon], {
+        renderer: canvasRenderer,
+        radius: radiusFor(st),
+        color: colorFor(st),
+        weight: 2,
+        fillOpacity: 0.8
+      }).on('click', () => {
+        openStationPopup(st);
+        handleStationClick(st);
+      }).addTo(clusterLayer);
+      continue;
+    }
+
+    const center = [c.lat / c.n, c.lon / c.n];
+    const avg = { shortage_score: c.shortage / c.n, congestion_score: c.congestion / c.n };
+    L.circleMarker(center, {
+      renderer: canvasRenderer,
+      radius: clamp(10 + Math.sqrt(c.n) * 2, 10, 30),
+      color: colorFor(avg),
+      weight: 2,
+      fillOpacity: 0.6
+    })
+      .bindTooltip(`${c.n}`, { permanent: true, direction: 'center', className: 'cluster-label' })
+      .on('click', () => map.setView(center, Math.min(map.getZoom() + 2, CLUSTER_MAX_ZOOM)))
+      .addTo(clusterLayer);
+  }
+}
+
+function heatPoints(){
+  const pts = [];
+  for (const st of stationsById.values()){
     const sev = Math.max(st.shortage_score ?? 0, st.congestion_score ?? 0);
-    heatPoints.push([st.lat, st.lon, sev]);
+    pts.push([st.lat, st.lon, sev]);
   }
+  return pts;
+}
 
+function updateHeat(){
+  // 히트맵이 켜져 있을 때만 포인트 배열을 만든다
+  if (!toggleHeat.checked) return;
   if (heatLayer){
-    heatLayer.setLatLngs(heatPoints);
+    heatLayer.setLatLngs(heatPoints());
   } else {
-    heatLayer = L.heatLayer(heatPoints, {radius: 25, blur: 15, maxZoom: 16});
+    heatLayer = L.heatLayer(heatPoints(), {radius: 25, blur: 15, maxZoom: 16}).addTo(map);
   }
 }
 
+function renderStations(){
+  const bounds = map.getBounds().pad(0.2);
+  if (map.getZoom() >= CLUSTER_MAX_ZOOM) renderIndividual(bounds);
+  else renderClusters(bounds);
+  dirtyIds.clear();
+}
+
+let redrawQueued = false;
+function scheduleRender(){
+  if (redrawQueued) return;
+  redrawQueued = true;
+  requestAnimationFrame(() => {
+    redrawQueued = false;
+    renderStations();
+  });
+}
+
+map.on('moveend zoomend', scheduleRender);
+
 toggleHeat.addEventListener('change', () => {
-  if (!heatLayer) return;
-  if (toggleHeat.checked) heatLayer.addTo(map);
-  else map.removeLayer(heatLayer);
+  if (toggleHeat.checked){
+    updateHeat();
+    if (heatLayer && !map.hasLayer(heatLayer)) heatLayer.addTo(map);
+  } else if (heatLayer){
+    map.removeLayer(heatLayer);
+  }
 });
 
 async function refresh(){
   try{
     statusEl.textContent = '업데이트 중...';
-    const stations = await fetchStations();
-    renderStations(stations);
-    statusEl.textContent = `대여소 ${stations.length}개 표시 중`;
+    const update = await fetchStations();
+    applyUpdate(update);
+    if (update.changed.length || update.removed.length){
+      scheduleRender();
+      updateHeat();
+    }
+    statusEl.textContent = `대여소 ${update.total}개 표시 중`;
   }catch(e){
     statusEl.textContent = `데이터 로드 실패: ${e.message}`;
   }
@@ -0,0 +1,48 @@
+// 대여소 JSON 다운로드/파싱을 메인 스레드 밖에서 처리.
+// 직전 스냅샷과 비교해서 바뀐 대여소만 메인 스레드로 보냄(structured clone 비용 최소화).
+
+let lastById = new Map();
+
+function sameStation(a, b){
+  return a.bikes === b.bikes
+    && a.capacity === b.capacity
+    && a.shortage_score === b.shortage_score
+    && a.congestion_score === b.congestion_score
+    && a.reward_return === b.reward_return
+    && a.reward_rent === b.reward_rent
+    && a.lat === b.lat
+    && a.lon === b.lon
+    && a.name === b.name;
+}
+
+self.onmessage = async (ev) => {
+  const { seq, url } = ev.data;
+  try{
+    const res = await fetch(url, { credentials: 'same-origin' });
+    const text = await res.text();
+    if (!res.ok) throw new Error(`${res.status} ${text}`);
+
+    const stations = JSON.parse(text);
+    const full = lastById.size === 0;
+    const nextById = new Map();
+    const changed = [];
+    let updatedAt = null;
+
+    for (const st of stations){
+      nextById.set(st.station_id, st);
+      if (st.updated_at) updatedAt = st.updated_at;
+      const prev = lastById.get(st.station_id);
+      if (!prev || !sameStation(prev, st)) changed.push(st);
+    }
+
+    const removed = [];
+    for (const id of lastById.keys()){
+      if (!nextById.has(id)) removed.push(id);
+    }
+    lastById = nextById;
+
+    self.postMessage({ seq, ok: true, full, changed, removed, total: stations.length, updatedAt });
+  }catch(e){
+    self.postMessage({ seq, ok: false, error: e.message });
+  }
+};
@@ -0,0 +1,30 @@
+import os
+from pathlib import Path
+
+import pytest
+
+# settings / stations CSV are read at import time: configure before importing the app
+TESTS_DIR = Path(__file__).resolve().parent
+os.environ["STATIONS_CSV_PATH"] = str(TESTS_DIR / "data" / "stations.csv")
+os.environ["REDIS_URL"] = ""
+os.environ["HISTORY_DB_PATH"] = ""
+os.environ["DEMAND_PROFILE_PATH"] = ""
+os.environ["LIVE_MODE"] = "mock"
+os.environ["ADMIN_API_KEY"] = "test-admin-key"
+os.environ["ADMIN_RATE_LIMIT"] = "1000/minute"
+os.environ["PUBLIC_RATE_LIMIT"] = "1000/minute"
+
+
+@pytest.fixture
+def admin_headers():
+    return {"X-API-Key": os.environ["ADMIN_API_KEY"]}
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+
+    from app import app
+
+    with TestClient(app) as c:
+        yield c
@@ -0,0 +1,61 @@
+import time
+
+
+def _wait_for_job(client, headers, job_id, timeout_sec=10.0):
+    deadline = time.monotonic() + timeout_sec
+    while True:
+        r = client.get("/api/admin/recompute/status", params={"job_id": job_id}, headers=headers)
+        assert r.status_code == 200, r.text
+        job = r.json()["job"]
+        if job["status"] in ("done", "failed"):
+            return job
+        assert time.monotonic() < deadline, f"job still {job['status']}"
+        time.sleep(0.05)
+
+
+def test_recompute_requires_admin_key(client):
+    r = client.post("/api/admin/recompute")
+    assert r.status_code == 401
+
+
+def test_recompute_enqueue_then_status(client, admin_headers):
+    r = client.post("/api/admin/recompute", headers=admin_headers)
+    assert r.status_code == 200, r.text
+    job = r.json()["job"]
+    assert job["job_id"]
+
+    done = _wait_for_job(client, admin_headers, job["job_id"])
+    assert done["status"] == "done", done
+    assert done["stations"] == 4
+
+    r = client.get("/api/admin/recompute/status", headers=admin_headers)
+    assert r.status_code == 200
+    assert r.json()["job"]["job_id"] == job["job_id"]
+
+
+def _stations_misses(client, headers):
+    caches = client.get("/api/admin/cache/stats", headers=headers).json()["caches"]
+    return next(c for c in caches if c["name"] == "public.stations")["misses"]
+
+
+def test_recompute_output_is_served(client, admin_headers):
+    r = client.post("/api/admin/recompute", headers=admin_headers)
+    done = _wait_for_job(client, admin_headers, r.json()["job"]["job_id"])
+    assert done["status"] == "done", done
+
+    misses = _stations_misses(client, admin_headers)
+
+    r = client.get("/api/public/stations")
+    assert r.status_code == 200
+    rows = r.json()
+    assert sorted(s["station_id"] for s in rows) == ["S1", "S2", "S3", "S4"]
+    assert {s["updated_at"] for s in rows} == {done["updated_at"]}
+
+    r = client.get("/api/public/stations", params={"region_id": "R2"})
+    assert sorted(s["station_id"] for s in r.json()) == ["S3", "S4"]
+
+    r = client.get("/api/public/regions")
+    assert sorted((g["region_id"], g["stations"]) for g in r.json()) == [("R1", 2), ("R2", 2)]
+
+    # served from the published snapshot, not recomputed by the API
+    assert _stations_misses(client, admin_headers) == misses
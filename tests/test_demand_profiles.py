@@ -0,0 +1,26 @@
+import os
+from array import array
+
+from src.config import settings
+from src.domain import demand_profiles as dp
+
+
+def test_relative_profile_path_resolves_from_project_root(tmp_path, monkeypatch):
+    path = tmp_path / "profiles.bin"
+    slots = 96
+    dp.DemandProfiles(["S1"], 15, 540, array("f", [1.0] * 7 * slots)).save(str(path))
+
+    monkeypatch.setattr(settings, "DEMAND_PROFILE_PATH", os.path.relpath(path, dp.BASE_DIR))
+    monkeypatch.setattr(dp, "_profiles", None)
+    monkeypatch.setattr(dp, "_profiles_mtime", 0.0)
+    monkeypatch.setattr(dp, "_checked_at", 0.0)
+    # started from some other directory (e.g. a worker launched elsewhere)
+    elsewhere = tmp_path / "elsewhere"
+    elsewhere.mkdir()
+    monkeypatch.chdir(elsewhere)
+
+    assert dp.profile_path().resolve() == path.resolve()
+    profiles = dp.get_profiles()
+    assert profiles is not None
+    assert profiles.expected_net_rents("S1", 1_700_000_000, 30) == 30.0
+    assert dp.profiles_version() > 0
@@ -0,0 +1,62 @@
+import pytest
+
+from src.config import settings
+from src.repos import history_repo
+
+HOUR = 3600
+DAY = 86400
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "HISTORY_DB_PATH", str(tmp_path / "history.sqlite3"))
+    monkeypatch.setattr(settings, "HISTORY_RAW_RETENTION_DAYS", 1)
+    for name in ("_conn", "_read_conn", "_compact_conn", "_compact_thread"):
+        monkeypatch.setattr(history_repo, name, None)
+    monkeypatch.setattr(history_repo, "_last_compact_at", 0.0)
+    yield history_repo
+    if history_repo._compact_thread is not None:
+        history_repo._compact_thread.join()
+    for name in ("_conn", "_read_conn", "_compact_conn"):
+        conn = getattr(history_repo, name)
+        if conn is not None:
+            conn.close()
+
+
+def _snapshot(bikes):
+    return [
+        {"station_id": f"S{i}", "bikes": bikes + i, "shortage_score": 0.5, "congestion_score": 0.0,
+         "reward_rent": 0, "reward_return": 9}
+        for i in range(3)
+    ]
+
+
+def test_compaction_uses_ts_index(store):
+    store.append_snapshot(_snapshot(1), ts=1_000_000)
+    conn = store._get_conn()
+    for sql in (
+        "SELECT * FROM station_history WHERE ts >= 1 AND ts < 2",
+        "DELETE FROM station_history WHERE ts < 1",
+        "DELETE FROM station_history_hourly WHERE ts < 1",
+    ):
+        plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql))
+        assert "USING" in plan and "INDEX" in plan, (sql, plan)
+
+
+def test_append_does_not_block_on_compaction_and_compact_rolls_up(store):
+    now = 1_800_000_000 - 1_800_000_000 % HOUR + 120
+    start = now - 2 * DAY
+    for ts in range(start, now, 600):
+        store.append_snapshot(_snapshot(1), ts=ts)
+    if store._compact_thread is not None:
+        store._compact_thread.join()
+
+    store.compact(now=now)
+    conn = store._get_conn()
+
+    raw_min = conn.execute("SELECT MIN(ts) FROM station_history").fetchone()[0]
+    assert raw_min >= now - DAY
+
+    hourly = store.query_station_history("S1", start - start % HOUR, until_ts=now, resolution="hour")
+    assert len(hourly) == 2 * 24
+    assert all(p["samples"] == 6 and p["bikes"] == 2 for p in hourly)
@@ -0,0 +1,35 @@
+import json
+import time
+
+from src.api.ingest import _aggregate, _parse_events
+
+
+def test_ndjson_bad_line_is_invalid_not_whole_batch():
+    body = b'{"station_id": "S1", "kind": "rent"}\n{not json\n\n{"station_id": "S2", "kind": "return"}\n'
+    events = _parse_events(body, "application/x-ndjson")
+    assert len(events) == 3
+
+    counts, invalid, stale, unknown = _aggregate(events, time.time())
+    assert invalid == 1
+    assert counts == {("S1", "rent"): 1, ("S2", "return"): 1}
+
+
+def test_aggregate_skips_unknown_stale_and_invalid():
+    now = time.time()
+    events = [
+        {"station_id": "S1", "kind": "rent"},
+        {"station_id": "S1", "kind": "rent", "ts": now - 30},
+        {"station_id": "S3", "kind": "return", "ts": now - 24 * 3600},
+        {"station_id": "nope" * 100, "kind": "rent"},
+        {"station_id": "S4", "kind": "teleport"},
+        {"station_id": "S4", "kind": "return", "ts": "not a time"},
+        42,
+    ]
+    counts, invalid, stale, unknown = _aggregate(json.loads(json.dumps(events)), now)
+    assert counts == {("S1", "rent"): 2}
+    assert (invalid, stale, unknown) == (3, 1, 1)
+
+
+def test_ingest_without_redis_is_503(client, admin_headers):
+    r = client.post("/api/ingest/events", json=[{"station_id": "S1", "kind": "rent"}], headers=admin_headers)
+    assert r.status_code == 503
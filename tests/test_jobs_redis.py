@@ -0,0 +1,41 @@
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")  # fakeredis needs it for EVALSHA
+
+from src.cache.redis_cache import RedisCache  # noqa: E402
+from src.worker.jobs import RecomputeJobQueue  # noqa: E402
+
+
+@pytest.fixture
+def queue():
+    cache = RedisCache()
+    cache.client = fakeredis.FakeRedis(decode_responses=True)
+    return RecomputeJobQueue(cache)
+
+
+def test_enqueue_coalesces_while_pending(queue):
+    first = queue.enqueue()
+    second = queue.enqueue()
+    assert not first["coalesced"]
+    assert second["coalesced"]
+    assert second["job_id"] == first["job_id"]
+    assert queue.get(first["job_id"])["triggers"] == 2
+
+
+def test_claim_clears_pending_and_merges_stale_ids(queue):
+    first = queue.enqueue()
+    # pending marker expired (e.g. worker was down) -> next trigger queues a new id
+    queue._cache.client.delete("jobs:recompute:pending")
+    stale = queue.enqueue()
+    assert not stale["coalesced"]
+
+    assert queue.wait_for_job(0) == first["job_id"]
+    merged = queue.get(stale["job_id"])
+    assert merged["status"] == "merged"
+    assert merged["merged_into"] == first["job_id"]
+    assert queue.get(first["job_id"])["triggers"] == 2
+    assert queue.wait_for_job(0) is None
+
+    # pending was cleared by the claim: a new trigger is a new job
+    assert not queue.enqueue()["coalesced"]
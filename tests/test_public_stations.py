@@ -0,0 +1,53 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from src.api import public
+
+
+@pytest.fixture
+def slow_compute(monkeypatch):
+    calls = []
+    real = public.compute_shard
+
+    def compute(region_id, stations, updated_at):
+        calls.append(threading.get_ident())
+        time.sleep(0.2)  # blocking, like the Redis MGET + scoring
+        return real(region_id, stations, updated_at)
+
+    monkeypatch.setattr(public, "compute_shard", compute)
+    monkeypatch.setattr(public, "get_published_manifest", lambda live_mode: None)
+    monkeypatch.setattr(public, "_stations_flight", public.SingleFlightCache("test.stations", ttl_sec=5))
+    return calls
+
+
+def test_concurrent_requests_share_one_off_loop_compute(slow_compute):
+    from app import app
+
+    async def run():
+        loop_thread = threading.get_ident()
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            tick_task = asyncio.create_task(ticker())
+            responses = await asyncio.gather(*(client.get("/api/public/stations") for _ in range(5)))
+            tick_task.cancel()
+        return loop_thread, ticks, responses
+
+    loop_thread, ticks, responses = asyncio.run(run())
+
+    assert all(r.status_code == 200 and len(r.json()) == 4 for r in responses)
+    assert len(slow_compute) == 1
+    assert slow_compute[0] != loop_thread
+    # the loop kept running while the shard was computed
+    assert ticks >= 5
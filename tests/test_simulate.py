@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from src.config import settings
+from src.repos.stations_repo import list_stations
+from src.worker import simulate as sim
+
+
+@pytest.fixture
+def context():
+    stations = list_stations()
+    rnd = random.Random(1)
+    t0 = 1_700_000_000
+    events = []
+    for m in range(0, 12 * 60, 2):
+        # S1 keeps draining, S2 keeps filling, S3/S4 roughly balanced
+        events.append((t0 + m * 60, 0, True))
+        events.append((t0 + m * 60 + 30, 1, False))
+        events.append((t0 + m * 60 + 10, rnd.choice([2, 3]), rnd.random() < 0.5))
+    events.sort()
+    sim._init_context(stations, events, sim.build_neighbors(stations, 2.0, 8), sim.SimOptions())
+    saved = {k: getattr(settings, k) for k in ("ALPHA", "BETA", "ROUTE_K", "F_LOW", "F_HIGH")}
+    yield stations
+    for k, v in saved.items():
+        setattr(settings, k, v)
+
+
+def test_station_rewards_change_rider_behaviour(context):
+    low = sim.run_simulation(sim.SimParams(0.0, 0.0, 0.0, 0.2, 0.8))
+    high = sim.run_simulation(sim.SimParams(40.0, 40.0, 0.0, 0.2, 0.8))
+
+    assert low["shifted_rents"] == 0 and low["redirected_returns"] == 0
+    assert high["shifted_rents"] > 0 and high["redirected_returns"] > 0
+    assert high["imbalance"] < low["imbalance"]
+
+
+def test_route_incentive_uses_rental_origin_congestion(context):
+    stations = context
+    settings.ROUTE_K = 14.0
+    congestion = [1.0, 0.0, 0.0, 0.0]
+    shortage = [0.0, 0.0, 1.0, 0.0]
+
+    # rented at congested S1, returned at short S3 -> paid
+    assert sim._route_minutes(stations, congestion, shortage, 0, 2) > 0
+    # origin not congested (return station's congestion must not count)
+    assert sim._route_minutes(stations, congestion, shortage, 1, 2) == 0
+    # unknown origin
+    assert sim._route_minutes(stations, congestion, shortage, -1, 2) == 0